@@ -6,6 +6,7 @@
 """
 
 import os
+import re
 import sys
 import json
 import logging
@@ -21,6 +22,14 @@ from .prompt_parser import IntelligentPromptParser
 
 logger = logging.getLogger(__name__)
 
+# AI回應解析用的正則（模組載入時編譯一次）
+_BASE64_FILE_RE = re.compile(r'base64[:\s]*([A-Za-z0-9+/=]+)', re.IGNORECASE)
+_DOWNLOAD_LINK_RE = re.compile(r'(?:下載|download)[:\s]+([^\s]+\.(?:pdf|docx?|doc))', re.IGNORECASE)
+# 匹配最多三層嵌套的JSON物件
+_NESTED_JSON_RE = re.compile(r'\{[^{}]*(?:\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}[^{}]*)*\}', re.DOTALL)
+_PRODUCT_NAME_RE = re.compile(r'(?:產品名稱|Product Name)[:：]\s*(.+)', re.IGNORECASE)
+_MANUFACTURER_RE = re.compile(r'(?:製造業者|Manufacturer)[:：]\s*(.+)', re.IGNORECASE)
+
 class DocumentExtractor:
     """通用文檔提取器"""
     
@@ -100,6 +109,7 @@ class DocumentExtractor:
                 # 創建一個假的AIClient，避免後續錯誤
                 self.ai_client = type('MockAIClient', (), {
                     'extract_data': lambda *args, **kwargs: {"error": "AI客戶端未正確初始化"},
+                    'extract_batch': lambda self, prompts, *args, **kwargs: [{"error": "AI客戶端未正確初始化"}] * len(prompts),
                     'generate_content': lambda *args, **kwargs: "AI客戶端未正確初始化"
                 })()
         return self.ai_client
@@ -498,19 +508,30 @@ class DocumentExtractor:
             chunks = self._split_content_into_chunks(content, chunk_size)
             logger.info(f"文檔已分成 {len(chunks)} 個段落進行處理")
             
-            # 處理每個段落
+            # 構建各段落提示詞（構建失敗的段落以例外物件記錄）
+            prompts = []
+            for i, chunk in enumerate(chunks):
+                try:
+                    prompts.append(self._build_chunk_extraction_prompt(chunk, i+1, len(chunks)))
+                except Exception as e:
+                    prompts.append(e)
+            
+            # 各段落互不相依，同時送出請求（並行數由 api_settings.max_concurrency 控制）
+            ai_client = self._get_ai_client()
+            pending = [i for i, prompt in enumerate(prompts) if not isinstance(prompt, Exception)]
+            logger.info(f"正在並行處理 {len(pending)} 個段落")
+            responses = list(prompts)
+            for i, response in zip(pending, ai_client.extract_batch([prompts[i] for i in pending])):
+                responses[i] = response
+            
+            # 處理每個段落的回應
             all_results = []
             successful_chunks = 0
             
-            for i, chunk in enumerate(chunks):
-                logger.info(f"正在處理第 {i+1}/{len(chunks)} 個段落")
+            for i, response in enumerate(responses):
                 try:
-                    # 構建段落提示詞
-                    prompt = self._build_chunk_extraction_prompt(chunk, i+1, len(chunks))
-                    
-                    # 調用AI API
-                    ai_client = self._get_ai_client()
-                    response = ai_client.extract_data(prompt)
+                    if isinstance(response, Exception):
+                        raise response
                     
                     # 解析回應
                     chunk_result = self._parse_ai_response(response)
@@ -1021,10 +1042,9 @@ class DocumentExtractor:
         """從AI回應中提取檔案"""
         try:
             import base64
-            import re
             
             # 檢查是否包含base64編碼的檔案
-            base64_match = re.search(r'base64[:\s]*([A-Za-z0-9+/=]+)', response, re.IGNORECASE)
+            base64_match = _BASE64_FILE_RE.search(response)
             if base64_match:
                 base64_data = base64_match.group(1)
                 try:
@@ -1043,7 +1063,7 @@ class DocumentExtractor:
                     logger.warning(f"Base64解碼失敗: {e}")
             
             # 檢查是否包含檔案下載連結
-            download_match = re.search(r'(?:下載|download)[:\s]+([^\s]+\.(?:pdf|docx?|doc))', response, re.IGNORECASE)
+            download_match = _DOWNLOAD_LINK_RE.search(response)
             if download_match:
                 file_path = download_match.group(1)
                 return {
@@ -1086,8 +1106,6 @@ class DocumentExtractor:
     def _parse_ai_response(self, response: str) -> Dict[str, Any]:
         """解析AI回應"""
         try:
-            import re
-            
             # 記錄原始回應以便調試
             logger.info(f"AI原始回應長度: {len(response)} 字符")
             logger.info(f"AI原始回應前500字符: {response[:500]}...")
@@ -1152,7 +1170,7 @@ class DocumentExtractor:
             
             # 嘗試提取JSON對象（更寬鬆的匹配）
             # 使用更強的方法來匹配多層嵌套的JSON
-            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}[^{}]*)*\}', response, re.DOTALL)
+            json_match = _NESTED_JSON_RE.search(response)
             if json_match:
                 json_str = json_match.group(0)
                 try:
@@ -1212,12 +1230,12 @@ class DocumentExtractor:
             basic_info = {}
             
             # 提取產品名稱
-            product_match = re.search(r'(?:產品名稱|Product Name)[:：]\s*(.+)', response, re.IGNORECASE)
+            product_match = _PRODUCT_NAME_RE.search(response)
             if product_match:
                 basic_info['產品名稱'] = product_match.group(1).strip()
             
             # 提取製造商
-            manufacturer_match = re.search(r'(?:製造業者|Manufacturer)[:：]\s*(.+)', response, re.IGNORECASE)
+            manufacturer_match = _MANUFACTURER_RE.search(response)
             if manufacturer_match:
                 basic_info['製造業者'] = manufacturer_match.group(1).strip()
             
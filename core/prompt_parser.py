@@ -5,14 +5,43 @@
 解析使用者的質樸需求，轉化為精確的處理指令
 """
 
+import os
 import re
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, NamedTuple, Pattern
 from dataclasses import dataclass
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
+_SENTENCE_SPLIT_RE = re.compile(r'[。！？；\n]')
+# 常見動詞/介詞的刪除對照表（str.translate 以 C 層級查表逐字處理）
+_FILLER_CHARS_TABLE = str.maketrans('', '', '把從在到給讓使')
+_FIELD_TOKEN_RE = re.compile(r'[\u4e00-\u9fff\w]+')
+
+# 提取欄位名稱時過濾的常見停用詞
+_STOP_WORDS = frozenset({'的', '了', '是', '在', '有', '和', '與', '或', '但', '而', '所以', '因為', '如果', '當', '時', '候'})
+
+# 句子數達到此門檻時改用執行緒池平行解析
+PARALLEL_SENTENCE_THRESHOLD = 32
+
+_sentence_pool: Optional[ThreadPoolExecutor] = None
+_sentence_pool_lock = threading.Lock()
+
+def _get_sentence_pool() -> ThreadPoolExecutor:
+    """取得共用的句子解析執行緒池（延遲建立）"""
+    global _sentence_pool
+    if _sentence_pool is None:
+        with _sentence_pool_lock:
+            if _sentence_pool is None:
+                _sentence_pool = ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    thread_name_prefix="prompt-parser"
+                )
+    return _sentence_pool
+
 class FieldType(Enum):
     """欄位類型"""
     TEXT = "text"
@@ -42,32 +71,56 @@ class FieldInstruction:
     format_rule: Optional[str] = None  # 格式化規則
     color_highlight: Optional[str] = None  # 著色標記
 
+class PatternRule(NamedTuple):
+    """模式規則：描述一個句型如何轉成欄位處理指令"""
+    pattern: Pattern[str]
+    field_type: FieldType
+    source_template: str  # 以 match.groups() 格式化，如 "第{0}頁"
+    action: ProcessingAction
+    extra_group_slots: Optional[Tuple[Tuple[str, int], ...]] = None  # (FieldInstruction屬性, 群組序號)
+    name_template: Optional[str] = None  # 頁面引用：未能提取欄位名稱時的預設名稱
+    color_highlight: Optional[str] = None
+
+# 依序比對，先命中者優先；所有模式於模組載入時預先編譯，首次解析無需編譯
+FIELD_RULES: Tuple[PatternRule, ...] = (
+    # 頁面引用模式
+    PatternRule(re.compile(r"第(\d+)頁"), FieldType.TEXT, "第{0}頁", ProcessingAction.EXTRACT,
+                name_template="第{0}頁內容"),
+    PatternRule(re.compile(r"第(\d+)頁第(\d+)段"), FieldType.TEXT, "第{0}頁第{1}段", ProcessingAction.EXTRACT,
+                name_template="第{0}頁第{1}段"),
+    PatternRule(re.compile(r"第(\d+)頁第(\d+)行"), FieldType.TEXT, "第{0}頁第{1}段", ProcessingAction.EXTRACT,
+                name_template="第{0}頁第{1}段"),
+    PatternRule(re.compile(r"第(\d+)頁表格第(\d+)行"), FieldType.TABLE, "第{0}頁表格第{1}行", ProcessingAction.EXTRACT,
+                name_template="第{0}頁表格第{1}行"),
+    
+    # 欄位引用模式
+    PatternRule(re.compile(r"(\w+)欄位"), FieldType.TEXT, "文檔中搜尋", ProcessingAction.EXTRACT),
+    PatternRule(re.compile(r"(\w+)部分"), FieldType.TEXT, "文檔中搜尋", ProcessingAction.EXTRACT),
+    PatternRule(re.compile(r"(\w+)區域"), FieldType.TEXT, "文檔中搜尋", ProcessingAction.EXTRACT),
+    
+    # 著色模式
+    PatternRule(re.compile(r"著色的(\w+)"), FieldType.TEXT, "文檔中著色文字", ProcessingAction.EXTRACT,
+                color_highlight="colored"),
+    PatternRule(re.compile(r"標記的(\w+)"), FieldType.TEXT, "文檔中標記文字", ProcessingAction.EXTRACT,
+                color_highlight="marked"),
+    PatternRule(re.compile(r"高亮的(\w+)"), FieldType.TEXT, "文檔中高亮文字", ProcessingAction.EXTRACT,
+                color_highlight="highlighted"),
+    
+    # 翻譯模式
+    PatternRule(re.compile(r"把(\w+)翻譯成(\w+)"), FieldType.TEXT, "文檔中搜尋", ProcessingAction.TRANSLATE,
+                extra_group_slots=(("translation_target", 2),)),
+    PatternRule(re.compile(r"(\w+)轉成(\w+)"), FieldType.TEXT, "文檔中搜尋", ProcessingAction.FORMAT,
+                extra_group_slots=(("format_rule", 2),)),
+    PatternRule(re.compile(r"(\w+)保持(\w+)"), FieldType.TEXT, "文檔中搜尋", ProcessingAction.COPY),
+)
+
 class IntelligentPromptParser:
     """智能提示詞解析器"""
     
+    __slots__ = ('field_patterns', 'action_keywords')
+    
     def __init__(self):
-        self.field_patterns = {
-            # 頁面引用模式
-            r"第(\d+)頁": self._parse_page_reference,
-            r"第(\d+)頁第(\d+)段": self._parse_page_paragraph_reference,
-            r"第(\d+)頁第(\d+)行": self._parse_page_paragraph_reference,
-            r"第(\d+)頁表格第(\d+)行": self._parse_page_table_reference,
-            
-            # 欄位引用模式
-            r"(\w+)欄位": self._parse_field_reference,
-            r"(\w+)部分": self._parse_section_reference,
-            r"(\w+)區域": self._parse_area_reference,
-            
-            # 著色模式
-            r"著色的(\w+)": self._parse_colored_field,
-            r"標記的(\w+)": self._parse_marked_field,
-            r"高亮的(\w+)": self._parse_highlighted_field,
-            
-            # 翻譯模式
-            r"把(\w+)翻譯成(\w+)": self._parse_translation_instruction,
-            r"(\w+)轉成(\w+)": self._parse_conversion_instruction,
-            r"(\w+)保持(\w+)": self._parse_language_preservation,
-        }
+        self.field_patterns: Tuple[PatternRule, ...] = FIELD_RULES
         
         self.action_keywords = {
             "取出": ProcessingAction.EXTRACT,
@@ -93,22 +146,21 @@ class IntelligentPromptParser:
         Returns:
             解析後的欄位處理指令列表
         """
-        instructions = []
-        
         # 按句子分割
         sentences = self._split_sentences(prompt)
         
-        for sentence in sentences:
-            instruction = self._parse_sentence(sentence)
-            if instruction:
-                instructions.append(instruction)
+        # 長提示詞的句子彼此獨立，交給共用執行緒池平行解析（map 保持原順序）
+        if len(sentences) >= PARALLEL_SENTENCE_THRESHOLD:
+            results = _get_sentence_pool().map(self._parse_sentence, sentences)
+        else:
+            results = map(self._parse_sentence, sentences)
         
-        return instructions
+        return [instruction for instruction in results if instruction]
     
     def _split_sentences(self, text: str) -> List[str]:
         """分割句子"""
         # 簡單的句子分割，可以根據需要改進
-        sentences = re.split(r'[。！？；\n]', text)
+        sentences = _SENTENCE_SPLIT_RE.split(text)
         return [s.strip() for s in sentences if s.strip()]
     
     def _parse_sentence(self, sentence: str) -> Optional[FieldInstruction]:
@@ -116,11 +168,11 @@ class IntelligentPromptParser:
         sentence = sentence.strip()
         
         # 嘗試匹配各種模式
-        for pattern, parser_func in self.field_patterns.items():
-            match = re.search(pattern, sentence)
+        for rule in self.field_patterns:
+            match = rule.pattern.search(sentence)
             if match:
                 try:
-                    return parser_func(sentence, match)
+                    return self._build_instruction(rule, sentence, match)
                 except Exception as e:
                     logger.warning(f"解析句子失敗: {sentence}, 錯誤: {e}")
                     continue
@@ -128,88 +180,30 @@ class IntelligentPromptParser:
         # 嘗試解析動作指令
         return self._parse_action_instruction(sentence)
     
-    def _parse_page_reference(self, sentence: str, match) -> FieldInstruction:
-        """解析頁面引用：第X頁"""
-        page_num = int(match.group(1))
-        
-        # 提取欄位名稱
-        field_name = self._extract_field_name(sentence)
-        
-        return FieldInstruction(
-            field_name=field_name or f"第{page_num}頁內容",
-            field_type=FieldType.TEXT,
-            source_location=f"第{page_num}頁",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT
-        )
-    
-    def _parse_page_paragraph_reference(self, sentence: str, match) -> FieldInstruction:
-        """解析頁面段落引用：第X頁第Y段"""
-        page_num = int(match.group(1))
-        para_num = int(match.group(2))
-        
-        field_name = self._extract_field_name(sentence)
-        
-        return FieldInstruction(
-            field_name=field_name or f"第{page_num}頁第{para_num}段",
-            field_type=FieldType.TEXT,
-            source_location=f"第{page_num}頁第{para_num}段",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT
-        )
-    
-    def _parse_page_table_reference(self, sentence: str, match) -> FieldInstruction:
-        """解析頁面表格引用：第X頁表格第Y行"""
-        page_num = int(match.group(1))
-        row_num = int(match.group(2))
-        
-        field_name = self._extract_field_name(sentence)
-        
-        return FieldInstruction(
-            field_name=field_name or f"第{page_num}頁表格第{row_num}行",
-            field_type=FieldType.TABLE,
-            source_location=f"第{page_num}頁表格第{row_num}行",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT
-        )
-    
-    def _parse_field_reference(self, sentence: str, match) -> FieldInstruction:
-        """解析欄位引用：XXX欄位"""
-        field_name = match.group(1)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中搜尋",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT
-        )
-    
-    def _parse_colored_field(self, sentence: str, match) -> FieldInstruction:
-        """解析著色欄位：著色的XXX"""
-        field_name = match.group(1)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中著色文字",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT,
-            color_highlight="colored"
-        )
-    
-    def _parse_translation_instruction(self, sentence: str, match) -> FieldInstruction:
-        """解析翻譯指令：把XXX翻譯成YYY"""
-        field_name = match.group(1)
-        target_lang = match.group(2)
+    def _build_instruction(self, rule: PatternRule, sentence: str, match) -> FieldInstruction:
+        """依規則表建立欄位處理指令"""
+        if rule.name_template is not None:
+            # 頁面引用：群組皆為頁碼/段落序號
+            numbers = [int(group) for group in match.groups()]
+            source_location = rule.source_template.format(*numbers)
+            field_name = self._extract_field_name(sentence) or rule.name_template.format(*numbers)
+        else:
+            source_location = rule.source_template.format(*match.groups())
+            field_name = match.group(1)
+        
+        extras = {}
+        if rule.extra_group_slots:
+            for attr, group_index in rule.extra_group_slots:
+                extras[attr] = match.group(group_index)
         
         return FieldInstruction(
             field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中搜尋",
+            field_type=rule.field_type,
+            source_location=source_location,
             target_location="模板對應位置",
-            action=ProcessingAction.TRANSLATE,
-            translation_target=target_lang
+            action=rule.action,
+            color_highlight=rule.color_highlight,
+            **extras
         )
     
     def _parse_action_instruction(self, sentence: str) -> Optional[FieldInstruction]:
@@ -230,16 +224,15 @@ class IntelligentPromptParser:
     def _extract_field_name(self, sentence: str) -> Optional[str]:
         """從句子中提取欄位名稱"""
         # 移除常見的動詞和介詞
-        cleaned = re.sub(r'[把從在到給讓使讓]', '', sentence)
-        
-        # 提取可能的欄位名稱
-        field_candidates = re.findall(r'[\u4e00-\u9fff\w]+', cleaned)
+        cleaned = sentence.translate(_FILLER_CHARS_TABLE)
         
-        # 過濾掉常見的停用詞
-        stop_words = {'的', '了', '是', '在', '有', '和', '與', '或', '但', '而', '所以', '因為', '如果', '當', '時', '候'}
-        field_candidates = [word for word in field_candidates if word not in stop_words]
+        # 提取可能的欄位名稱，回傳第一個非停用詞
+        for match in _FIELD_TOKEN_RE.finditer(cleaned):
+            candidate = match.group(0)
+            if candidate not in _STOP_WORDS:
+                return candidate
         
-        return field_candidates[0] if field_candidates else None
+        return None
     
     def generate_ai_prompt(self, instructions: List[FieldInstruction], 
                           document_content: str, template_info: str) -> str:
@@ -308,80 +301,3 @@ class IntelligentPromptParser:
             desc += f"，注意著色標記"
         
         return desc
-    
-    def _parse_section_reference(self, sentence: str, match) -> FieldInstruction:
-        """解析區域引用：XXX區域"""
-        field_name = match.group(1)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中搜尋",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT
-        )
-    
-    def _parse_area_reference(self, sentence: str, match) -> FieldInstruction:
-        """解析區域引用：XXX區域"""
-        field_name = match.group(1)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中搜尋",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT
-        )
-    
-    def _parse_marked_field(self, sentence: str, match) -> FieldInstruction:
-        """解析標記欄位：標記的XXX"""
-        field_name = match.group(1)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中標記文字",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT,
-            color_highlight="marked"
-        )
-    
-    def _parse_highlighted_field(self, sentence: str, match) -> FieldInstruction:
-        """解析高亮欄位：高亮的XXX"""
-        field_name = match.group(1)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中高亮文字",
-            target_location="模板對應位置",
-            action=ProcessingAction.EXTRACT,
-            color_highlight="highlighted"
-        )
-    
-    def _parse_conversion_instruction(self, sentence: str, match) -> FieldInstruction:
-        """解析轉換指令：XXX轉成YYY"""
-        field_name = match.group(1)
-        target_format = match.group(2)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中搜尋",
-            target_location="模板對應位置",
-            action=ProcessingAction.FORMAT,
-            format_rule=target_format
-        )
-    
-    def _parse_language_preservation(self, sentence: str, match) -> FieldInstruction:
-        """解析語言保持指令：XXX保持YYY"""
-        field_name = match.group(1)
-        language = match.group(2)
-        
-        return FieldInstruction(
-            field_name=field_name,
-            field_type=FieldType.TEXT,
-            source_location="文檔中搜尋",
-            target_location="模板對應位置",
-            action=ProcessingAction.COPY
-        )
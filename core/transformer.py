@@ -6,20 +6,495 @@
 """
 
 import os
+import re
 import sys
 import json
 import logging
+import zipfile
+from copy import deepcopy
+from io import BytesIO
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import Dict, Any, Optional, Union, List
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional, Union, List, Sequence, Tuple
 from docxtpl import DocxTemplate
+from jinja2 import Environment
 import pdfplumber
+from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 
+# orjson 為可選的加速套件，未安裝時使用標準庫 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# pyahocorasick 為可選的加速套件，未安裝時逐一比對子字串
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# 模板中真正的Jinja2變數（字母數字組合），如 {{ product_name }}
+_JINJA_VAR_RE = re.compile(r'\{\{\s*[a-zA-Z_][a-zA-Z0-9_.]*\s*\}\}')
+_XML_TAG_RE = re.compile(r'<[^>]+>')
+
+# 所有 DocxTemplate 渲染共用的 Jinja2 環境，避免每次渲染重建環境與註冊過濾器
+# （docxtpl 以 from_string 編譯 XML，不經 loader，故不使用 bytecode cache）
+_JINJA_ENV = Environment(autoescape=False)
+
+# 可選：設定 PRODOCUX_MINIJINJA=1 時改用 minijinja（Rust 實作）執行模板，
+# 成分表等大量迴圈的模板渲染較快；未安裝 minijinja 時自動退回 Jinja2
+USE_MINIJINJA = os.environ.get('PRODOCUX_MINIJINJA', '0') == '1'
+
+class _MiniJinjaTemplate:
+    """提供 docxtpl 需要的 render(context) 介面"""
+    
+    def __init__(self, env, source: str):
+        self._env = env
+        self._source = source
+    
+    def render(self, context: Dict[str, Any]) -> str:
+        name = f"docx-part-{id(self)}"
+        self._env.add_template(name, self._source)
+        try:
+            return self._env.render_template(name, **context)
+        finally:
+            self._env.remove_template(name)
+
+class _MiniJinjaEnvironment:
+    """將 minijinja 包裝成 docxtpl 使用的 Jinja2 Environment 介面（from_string）"""
+    
+    def __init__(self):
+        import minijinja
+        self._env = minijinja.Environment()
+    
+    def from_string(self, source: str) -> _MiniJinjaTemplate:
+        return _MiniJinjaTemplate(self._env, source)
+
+_minijinja_env: Optional[_MiniJinjaEnvironment] = None
+
+def _get_render_env():
+    """取得 docx 模板渲染使用的模板環境"""
+    global _minijinja_env, USE_MINIJINJA
+    if USE_MINIJINJA:
+        if _minijinja_env is None:
+            try:
+                _minijinja_env = _MiniJinjaEnvironment()
+            except ImportError:
+                logger.warning("PRODOCUX_MINIJINJA=1 but minijinja is not installed, using Jinja2")
+                USE_MINIJINJA = False
+                return _JINJA_ENV
+        return _minijinja_env
+    return _JINJA_ENV
+
+# 回退替換模式的占位符：[[key]] / <<key>> / {key} / 《key》
+_PLACEHOLDER_RE = re.compile(r'\[\[([^\]]+)\]\]|<<([^>]+)>>|\{([^{}]+)\}|《([^》]+)》')
+
+# 成分字串各欄位，如 "Alcohol denat. (CAS: 64-17-5, 含量: 76.8%, 功能: 溶劑)"
+_INGREDIENT_RE = re.compile(
+    r'(?P<inci>[^(]+?)\s*\(\s*CAS:\s*(?P<cas>[^,)]*),\s*含量:\s*(?P<content>[^,)]*),'
+    r'\s*功能:\s*(?P<func>[^)]*)\)'
+)
+_INCI_RE = re.compile(r'^([^(]+)')
+_CAS_RE = re.compile(r'CAS:\s*([^,)]+)')
+_CONTENT_RE = re.compile(r'含量:\s*([^,)]+)')
+_FUNC_RE = re.compile(r'功能:\s*([^)]+)')
+
+# 成分表表頭關鍵字（不分大小寫）
+_INGREDIENTS_HEADER_RE = re.compile(r'inci|cas|w/v|功能|ingredient|content', re.IGNORECASE)
+
+# 成分表標題分類：各分支以行首的前瞻比對整個標題，依分支順序決定優先權（與逐一檢查相同）
+_TAB_HEADER_RE = re.compile(
+    r'(?P<inci>(?=.*?(?:inci|名稱)))'
+    r'|(?P<cas>(?=.*?(?:cas|號碼)))'
+    r'|(?P<content>(?=.*?(?:w/v|含量|%)))'
+    r'|(?P<func>(?=.*?(?:功能|function)))',
+    re.IGNORECASE | re.DOTALL
+)
+_MARKDOWN_HEADER_RE = re.compile(
+    r'(?P<inci>(?=.*?(?:成分|name)))'
+    r'|(?P<cas>(?=.*?cas))'
+    r'|(?P<content>(?=.*?(?:含量|content|w/v)))'
+    r'|(?P<func>(?=.*?(?:功能|function|說明)))',
+    re.IGNORECASE | re.DOTALL
+)
+_HEADER_FIELDS = {'inci': 'INCI名稱', 'cas': 'CAS號碼', 'content': '含量', 'func': '功能'}
+
+def _classify_tab_header(header: str) -> str:
+    """將 Tab 分隔成分表的標題對應到標準欄位名稱，無法對應時沿用原標題"""
+    match = _TAB_HEADER_RE.match(header)
+    return _HEADER_FIELDS[match.lastgroup] if match else header
+
+def _classify_markdown_header(header: str) -> Optional[str]:
+    """將 Markdown 成分表的標題對應到標準欄位名稱，無法對應時回傳 None（略過該欄）"""
+    match = _MARKDOWN_HEADER_RE.match(header)
+    return _HEADER_FIELDS[match.lastgroup] if match else None
+
+# Markdown 表格：儲存格分隔（連同兩側空白）、分隔列、成分表表頭提示
+_MD_CELL_SPLIT_RE = re.compile(r'\s*\|\s*')
+_MD_SEPARATOR_ROW_RE = re.compile(r'\|[\s\-:|]+\|')
+_MD_HEADER_HINT_RE = re.compile(r'成分|inci|序號', re.IGNORECASE)
+
+# 成分表寫入的欄位數（INCI名稱、CAS號碼、含量、功能）
+_INGREDIENTS_TABLE_COLUMNS = 4
+
+@lru_cache(maxsize=256)
+def _is_ingredients_header(header_cells: Tuple[str, ...]) -> bool:
+    """依表格第一列的儲存格文字判斷是否為成分表表頭（同樣的表頭只判斷一次）"""
+    # 欄位不足的表格無法寫入成分資料，直接排除
+    if len(header_cells) < _INGREDIENTS_TABLE_COLUMNS:
+        return False
+    return bool(_INGREDIENTS_HEADER_RE.search(" ".join(header_cells)))
+
+# 儲存 .docx 時的寫入緩衝區大小，減少 write() 系統呼叫次數
+_SAVE_BUFFER_SIZE = 1024 * 1024
+
+def _save_docx(document, output_path: Path) -> None:
+    """透過大緩衝區的檔案物件儲存 Document / DocxTemplate"""
+    with open(output_path, 'wb', buffering=_SAVE_BUFFER_SIZE) as f:
+        document.save(f)
+
+# 表格相關的 WordprocessingML 標籤
+_W_TR = qn('w:tr')
+_W_TR_PR = qn('w:trPr')
+_W_TBL_HEADER = qn('w:tblHeader')
+_W_TC = qn('w:tc')
+_W_P = qn('w:p')
+_W_R = qn('w:r')
+_W_T = qn('w:t')
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# 插入資料的淺藍底色，每次使用時複製一份，避免重複建立元素與設定屬性
+_SHADING_PROTO = OxmlElement('w:shd')
+_SHADING_PROTO.set(qn('w:val'), 'clear')
+_SHADING_PROTO.set(qn('w:color'), 'auto')
+_SHADING_PROTO.set(qn('w:fill'), 'B4D4E6')
+
+def _apply_shading(run) -> None:
+    """為 run 加上淺藍底色"""
+    _shade_run_element(run._element)
+
+def _shade_run_element(r) -> None:
+    """為 w:r 元素加上淺藍底色"""
+    r.get_or_add_rPr().append(deepcopy(_SHADING_PROTO))
+
+def _cell_text_run(tc):
+    """取得儲存格第一段落的第一個 w:r（沒有時新增），作為寫入文字的位置"""
+    p = tc.find(_W_P)
+    if p is None:
+        return None
+    r = p.find(_W_R)
+    if r is None:
+        r = OxmlElement('w:r')
+        p.append(r)
+    return r
+
+def _set_run_element_text(r, text: str) -> None:
+    """設定 w:r 第一個 w:t 的文字（沒有時新增）"""
+    t = r.find(_W_T)
+    if t is None:
+        t = OxmlElement('w:t')
+        r.append(t)
+    t.text = text
+    if text != text.strip():
+        t.set(_XML_SPACE, 'preserve')
+
+def _iter_data_values(obj: Any) -> Iterator[str]:
+    """逐一產生資料中需要標記的值（長度大於2的字串表示）"""
+    if isinstance(obj, dict):
+        for value in obj.values():
+            yield from _iter_data_values(value)
+        return
+    
+    if isinstance(obj, list):
+        for item in obj:
+            if isinstance(item, dict):
+                yield from _iter_data_values(item)
+                continue
+            value = str(item).strip() if item is not None else ""
+            if len(value) > 2:
+                yield value
+        return
+    
+    value = str(obj).strip() if obj is not None else ""
+    if len(value) > 2:
+        yield value
+
+def _iter_ingredient_values(data: Dict[str, Any]) -> Iterator[str]:
+    """逐一產生成分表各欄位的值（長度大於1即標記）"""
+    ingredients_data = data.get('成分表', [])
+    if not isinstance(ingredients_data, list):
+        return
+    for ingredient in ingredients_data:
+        if isinstance(ingredient, dict):
+            for field in ('INCI名稱', 'CAS號碼', '含量', '功能'):
+                value = str(ingredient.get(field, '')).strip()
+                if len(value) > 1:
+                    yield value
+
+def _contains_bucketed(text: str, by_first_char: Dict[str, List[str]]) -> bool:
+    """檢查文字是否包含任一資料值，只比對首字出現在文字中的候選值"""
+    for char in set(text):
+        for value in by_first_char.get(char, ()):
+            if value in text:
+                return True
+    return False
+
+def _build_value_matcher(values: Iterable[str]) -> Tuple[Callable[[str], bool], int]:
+    """建立「文字是否包含任一資料值」的比對函式
+
+    文字與資料值完全相同時直接以集合命中；否則有 pyahocorasick 時以
+    Aho-Corasick 自動機掃描一次，沒有時只檢查首字出現在文字中的候選值。
+
+    Returns:
+        (比對函式, 不重複的資料值數量)
+    """
+    distinct = set(values)
+    if not distinct:
+        return (lambda text: False), 0
+    
+    # 包含其他資料值的較長值不必比對：文字含有長值時必定也含有其中的短值。
+    # 由短到長檢查，只保留不含任何已保留值者
+    by_first_char: Dict[str, List[str]] = defaultdict(list)
+    for value in sorted(distinct, key=len):
+        if not _contains_bucketed(value, by_first_char):
+            by_first_char[value[0]].append(value)
+    exact = set(chain.from_iterable(by_first_char.values()))
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for value in exact:
+            automaton.add_word(value, value)
+        automaton.make_automaton()
+        return (lambda text: text in exact or next(automaton.iter(text), None) is not None), len(distinct)
+    
+    def contains_value(text: str) -> bool:
+        return text in exact or _contains_bucketed(text, by_first_char)
+    
+    return contains_value, len(distinct)
+
+def _iter_paragraph_xml(document_xml: str):
+    """依 </w:p> 邊界逐段產生 document.xml 片段，不建立完整的去標籤文字"""
+    start = 0
+    while True:
+        end = document_xml.find('</w:p>', start)
+        if end == -1:
+            yield document_xml[start:]
+            return
+        end += len('</w:p>')
+        yield document_xml[start:end]
+        start = end
+
+@lru_cache(maxsize=16)
+def _read_template_bytes(template_path: str, template_mtime_ns: int) -> bytes:
+    """讀取模板檔案內容，以 (路徑, 修改時間) 為快取鍵，模板更新後自動重新讀取"""
+    return Path(template_path).read_bytes()
+
+def _open_template(template_path: Path) -> BytesIO:
+    """以記憶體串流開啟模板，同一模板在偵測、渲染與批次轉換之間只讀取磁碟一次"""
+    return BytesIO(_read_template_bytes(str(template_path), template_path.stat().st_mtime_ns))
+
+@lru_cache(maxsize=128)
+def _detect_has_jinja_cached(template_path: str, template_mtime_ns: int,
+                             meta_mtime_ns: Optional[int]) -> bool:
+    """判斷模板是否含 Jinja2 變數，以 (路徑, 修改時間) 為快取鍵避免重複讀取"""
+    template_file = Path(template_path)
+    
+    if meta_mtime_ns is not None:
+        # 元數據存在時直接信任其 has_jinja 標記，不再掃描模板；元數據損毀則拋出例外
+        meta_path = template_file.parent / f"{template_file.stem}.json"
+        meta = _json_loads(meta_path.read_bytes())
+        has_jinja = meta.get('has_jinja', False)
+        placeholders = meta.get('placeholders', [])
+        logger.info(f"Read from metadata: has_jinja={has_jinja}, placeholders={len(placeholders)}")
+        return has_jinja
+    
+    # 如果沒有元數據文件，回退到原始檢查
+    # 直接掃描 word/document.xml，不建立 python-docx 物件樹
+    try:
+        template_bytes = _read_template_bytes(template_path, template_mtime_ns)
+        with zipfile.ZipFile(BytesIO(template_bytes)) as docx_zip:
+            document_xml = docx_zip.read('word/document.xml').decode('utf-8', 'ignore')
+        
+        # 檢查是否包含真正的Jinja2變數（字母數字組合），命中即停止
+        match = _JINJA_VAR_RE.search(document_xml)
+        if not match:
+            # Word 可能把 {{ }} 拆到多個 run，逐段移除XML標籤後再檢查
+            for paragraph_xml in _iter_paragraph_xml(document_xml):
+                match = _JINJA_VAR_RE.search(_XML_TAG_RE.sub('', paragraph_xml))
+                if match:
+                    break
+        has_jinja = match is not None
+        logger.info(f"Template variable check (fallback): has_jinja={has_jinja}")
+        if has_jinja:
+            logger.info(f"Found Jinja2 variable: {match.group(0)}")
+        return has_jinja
+    except Exception as e:
+        logger.warning(f"Template variable check failed: {e}")
+        return False
+
+def _find_nested_keys(data: Dict[str, Any], target_keys: frozenset) -> Dict[str, Any]:
+    """
+    單次深度優先走訪，找出每個目標鍵在嵌套結構中的值
+    
+    結果與逐鍵遞歸搜尋相同：同一層的鍵優先於子結構，依序走訪 dict 及 list 中的 dict；
+    某層的鍵值為 None 時，不再往該層的子結構搜尋此鍵。
+    """
+    found: Dict[str, Any] = {}
+    stack = [(data, frozenset())]
+    while stack and len(found) < len(target_keys):
+        node, blocked = stack.pop()
+        present = target_keys.intersection(node)
+        for key in present:
+            if key not in found and key not in blocked and node[key] is not None:
+                found[key] = node[key]
+        if present:
+            blocked = blocked | present
+        
+        children = []
+        for value in node.values():
+            if isinstance(value, dict):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, dict))
+        stack.extend((child, blocked) for child in reversed(children))
+    return found
+
 class DocumentTransformer:
     """文檔轉換器"""
     
+    # 定義欄位映射規則 - 支援多種可能的欄位名稱
+    _FIELD_MAPPINGS = {
+        # 產品基本資訊映射
+        '產品名稱': [
+            '產品名稱', 'product_name', 'name', 'title', '產品標題',
+            '基本資訊.產品名稱', '產品檔案.基本資訊.產品名稱',
+            '產品基本資訊.產品名稱', '處理結果.產品檔案.基本資訊.產品名稱'
+        ],
+        '產品類別': [
+            '產品類別', 'product_category', 'category', 'type', '產品類型',
+            '基本資訊.產品類別', '產品檔案.基本資訊.產品類型',
+            '產品基本資訊.產品類型', '處理結果.產品檔案.基本資訊.產品類型'
+        ],
+        '產品劑型': [
+            '產品劑型', 'product_form', 'form', '劑型', '物理形態', '物理狀態',
+            '基本資訊.產品劑型', '產品檔案.基本資訊.物理形態',
+            '產品基本資訊.產品劑型', '處理結果.產品檔案.物理化學特性.物理狀態'
+        ],
+        '產品用途': [
+            '產品用途', 'product_use', 'use', '用途', 'intended_use',
+            '基本資訊.產品用途', '產品檔案.基本資訊.產品用途',
+            '產品基本資訊.產品用途', '處理結果.產品檔案.基本資訊.產品用途'
+        ],
+        '容量': [
+            '容量', 'volume', 'size', 'content', '包裝容量',
+            '基本資訊.容量', '產品檔案.穩定性與包裝.容量',
+            '產品基本資訊.容量', '處理結果.產品檔案.穩定性與包裝.容量'
+        ],
+        '原產地': [
+            '原產地', 'country_of_origin', 'origin', '原產國', '產地', 'country',
+            '基本資訊.原產地', '產品檔案.基本資訊.原產國',
+            '產品基本資訊.原產地', '處理結果.產品檔案.基本資訊.原產國',
+            'result.product_info.basic.country', 'result.product_info.basic.origin'
+        ],
+        # 製造商資訊映射
+        '製造商名稱': [
+            '製造商名稱', 'manufacturer_name', 'manufacturer', '製造商', '公司名稱',
+            '製造商資訊.公司名稱', '產品檔案.製造商資訊.公司名稱',
+            '廠商與負責人資訊.製造商.名稱', '處理結果.產品檔案.製造商資訊.公司名稱'
+        ],
+        '製造商地址': [
+            '製造商地址', 'manufacturer_address', 'manufacturer_addr', '地址',
+            '製造商資訊.地址', '產品檔案.製造商資訊.地址',
+            '廠商與負責人資訊.製造商.地址', '處理結果.產品檔案.製造商資訊.地址'
+        ],
+        '製造商聯絡方式': [
+            '製造商聯絡方式', 'manufacturer_contact', 'manufacturer_phone', '電話', '聯絡方式',
+            '製造商資訊.電話', '產品檔案.製造商資訊.電話',
+            '廠商與負責人資訊.製造商.電話', '處理結果.產品檔案.製造商資訊.電話'
+        ],
+        # 輸入商資訊映射
+        '輸入商名稱': [
+            '輸入商名稱', 'importer_name', 'importer', '輸入商', '責任人', '歐盟負責人',
+            '責任人資訊.公司名稱', '產品檔案.責任人資訊.公司名稱',
+            '廠商與負責人資訊.歐盟負責人.名稱', '處理結果.產品檔案.責任人資訊.公司名稱'
+        ],
+        '輸入商地址': [
+            '輸入商地址', 'importer_address', 'importer_addr',
+            '責任人資訊.地址', '產品檔案.責任人資訊.地址',
+            '廠商與負責人資訊.歐盟負責人.地址', '處理結果.產品檔案.責任人資訊.地址'
+        ],
+        '輸入商電話': [
+            '輸入商電話', 'importer_phone', 'importer_contact',
+            '責任人資訊.電話', '產品檔案.責任人資訊.電話',
+            '廠商與負責人資訊.歐盟負責人.電話', '處理結果.產品檔案.責任人資訊.電話'
+        ],
+        # 成分表映射
+        '成分表': [
+            '成分表', 'ingredients', 'ingredient_list', '成分', '完整成分表', '完整成分表(INCI)',
+            '主要成分', '成分資訊', 'ingredient_info', 'composition'
+        ],
+        # 其他資訊映射
+        '有效期限': [
+            '有效期限', 'expiry_date', 'shelf_life', '保質期', '產品保質期', '開封後保質期(PAO)',
+            '穩定性與包裝.產品保質期', '產品檔案.穩定性與包裝.產品保質期',
+            '穩定性與儲存.最短保質期', '處理結果.產品檔案.穩定性與包裝.產品保質期'
+        ],
+        '安全評估結果': [
+            '安全評估結果', 'safety_assessment', 'safety_evaluation', '安全評估結論',
+            '安全資訊.安全評估結論', '產品檔案.安全資訊.安全評估結論',
+            '處理結果.產品檔案.安全資訊.安全評估結論'
+        ],
+        '成分安全性': [
+            '成分安全性', 'ingredient_safety', 'safety_info',
+            '安全資訊.成分安全性', '產品檔案.安全資訊.成分安全性',
+            '處理結果.產品檔案.安全資訊.成分安全性'
+        ],
+        '使用限制': [
+            '使用限制', 'usage_restrictions', 'restrictions', '使用限制和禁忌',
+            '安全資訊.使用限制', '產品檔案.安全資訊.使用限制',
+            '處理結果.產品檔案.安全資訊.使用限制'
+        ],
+        '使用方式': [
+            '使用方式', 'usage_method', 'how_to_use', '使用方法', '使用注意事項',
+            '安全資訊.標籤警語.使用注意事項', '產品檔案.安全資訊.標籤警語.使用注意事項',
+            '處理結果.產品檔案.安全資訊.標籤警語.使用注意事項'
+        ],
+        '注意事項': [
+            '注意事項', 'precautions', 'warnings', '使用注意事項',
+            '安全資訊.標籤警語.使用注意事項', '產品檔案.安全資訊.標籤警語.使用注意事項',
+            '處理結果.產品檔案.安全資訊.標籤警語.使用注意事項'
+        ],
+        '使用部位': [
+            '使用部位', 'application_site', 'where_to_use', '適用部位'
+        ]
+    }
+    
+    # 預先切分的欄位路徑：{目標欄位: [(路徑, 路徑各層鍵), ...]}，避免每次轉換重複 split('.')
+    _FIELD_PATHS = {
+        target: [(path, tuple(path.split('.'))) for path in paths]
+        for target, paths in _FIELD_MAPPINGS.items()
+    }
+    
+    # 成分欄位別名：{別名: (標準欄位, 優先順序)}，順序越前越優先
+    _INGREDIENT_FIELD_ALIASES = {
+        alias: (canonical, rank)
+        for canonical, aliases in {
+            'INCI名稱': ['INCI名稱', 'inci_name', 'name', '成分名稱', 'ingredient_name'],
+            'CAS號碼': ['CAS號碼', 'cas_number', 'cas', 'CAS', 'cas_no'],
+            '含量': ['含量', 'content', 'percentage', '百分比', 'concentration', 'w/v%'],
+            '功能': ['功能', 'function', 'purpose', '功能說明', 'role'],
+        }.items()
+        for rank, alias in enumerate(aliases)
+    }
+    
     def __init__(self, profile_path: Optional[str] = None):
         """初始化文檔轉換器"""
         # 以使用者工作空間為優先
@@ -40,18 +515,29 @@ class DocumentTransformer:
                 self.template_dir = Path("templates")
         
         # 載入Profile資訊
+        self.profile_path = profile_path
         self.profile_fields = {}
         if profile_path:
             self._load_profile(profile_path)
         
+        # Profile 已知所需欄位時，只套用對應的欄位映射；沒有交集則使用全部映射
+        self._active_field_paths = {
+            target: paths for target, paths in self._FIELD_PATHS.items()
+            if target in self.profile_fields
+        } or self._FIELD_PATHS
+        self._active_simple_field_names = frozenset(
+            path for paths in self._active_field_paths.values() for path, keys in paths if len(keys) == 1
+        )
+        
         logger.info("Document transformer initialized")
     
     def _load_profile(self, profile_path: str):
         """載入Profile資訊"""
         try:
             import yaml
-            with open(profile_path, 'r', encoding='utf-8') as f:
-                profile_data = yaml.safe_load(f)
+            # 一次讀入整個檔案；有 libyaml 時使用 C 實作的 CSafeLoader
+            loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+            profile_data = yaml.load(Path(profile_path).read_bytes(), Loader=loader)
             
             # 提取欄位名稱
             if 'fields' in profile_data:
@@ -102,6 +588,28 @@ class DocumentTransformer:
             # 直接拋出異常，不使用回退機制
             raise Exception(f"文檔轉換失敗: {e}")
     
+    def transform_many(self, jobs: Sequence[Tuple[Any, ...]],
+                       max_workers: Optional[int] = None) -> List[bool]:
+        """
+        以多個行程平行轉換多份文檔
+        
+        Args:
+            jobs: 轉換工作列表，每項為 transform() 的位置參數
+                  (data, template_path, output_path[, output_format[, allow_fallback]])
+            max_workers: 最大行程數，預設為CPU核心數
+            
+        Returns:
+            與 jobs 順序相同的轉換結果列表
+        """
+        if len(jobs) <= 1:
+            return [self.transform(*job) for job in jobs]
+        
+        # 每個子行程只建立一次轉換器（沿用相同Profile），再依序處理分配到的工作
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_transform_worker,
+                                 initargs=(self.profile_path,)) as executor:
+            return list(executor.map(_run_transform_job, jobs))
+    
     def _transform_to_docx(self, data: Dict[str, Any], 
                           template_path: Path, output_path: Path, allow_fallback: bool = False) -> bool:
         """轉換為Word文檔"""
@@ -114,49 +622,11 @@ class DocumentTransformer:
                 logger.warning("Non-.docx template, copied directly; recommend using .docx for rendering")
                 return True
 
-            # 檢查模板元數據以判斷是否含 jinja 變數
-            has_jinja = False
-            try:
-                # 首先檢查元數據文件
-                meta_path = template_path.parent / f"{template_path.stem}.json"
-                if meta_path.exists():
-                    import json
-                    with open(meta_path, 'r', encoding='utf-8') as f:
-                        meta = json.load(f)
-                    has_jinja = meta.get('has_jinja', False)
-                    placeholders = meta.get('placeholders', [])
-                    logger.info(f"Read from metadata: has_jinja={has_jinja}, placeholders={len(placeholders)}")
-                else:
-                    # 如果沒有元數據文件，回退到原始檢查
-                    # 更準確的Jinja2變數檢測：檢查是否包含真正的模板變數
-                    try:
-                        from docx import Document
-                        doc = Document(str(template_path))
-                        all_text = ""
-                        for para in doc.paragraphs:
-                            all_text += para.text + "\n"
-                        for table in doc.tables:
-                            for row in table.rows:
-                                for cell in row.cells:
-                                    all_text += cell.text + "\n"
-                        
-                        # 檢查是否包含真正的Jinja2變數（字母數字組合）
-                        import re
-                        jinja_pattern = r'\{\{\s*[a-zA-Z_][a-zA-Z0-9_.]*\s*\}\}'
-                        has_jinja = bool(re.search(jinja_pattern, all_text))
-                        logger.info(f"Template variable check (fallback): has_jinja={has_jinja}")
-                        if has_jinja:
-                            matches = re.findall(jinja_pattern, all_text)
-                            logger.info(f"Found Jinja2 variables: {matches[:5]}")
-                    except Exception as e:
-                        logger.warning(f"Template variable check failed: {e}")
-                        has_jinja = False
-            except Exception as e:
-                logger.warning(f"Template variable check failed: {e}")
-                has_jinja = True
+            # 檢查模板是否含 jinja 變數（元數據優先）
+            has_jinja = self._detect_has_jinja(template_path)
 
             if has_jinja:
-                template = DocxTemplate(template_path)
+                template = DocxTemplate(_open_template(template_path))
                 
                 # 添加調試信息
                 logger.info(f"Starting Word template rendering: {template_path}")
@@ -169,9 +639,13 @@ class DocumentTransformer:
                 logger.info(f"Transformed data structure: {list(template_data.keys())}")
                 
                 try:
-                    template.render(template_data)
-                    template.save(output_path)
+                    template.render(template_data, jinja_env=_get_render_env())
                     logger.info("Template rendering successful")
+                    
+                    # Jinja2渲染後，直接在記憶體中的文檔進行成分表替換及底色標記，再儲存一次
+                    logger.info("Performing ingredient table replacement after Jinja2 rendering")
+                    self._post_process_document(template.docx, data)
+                    _save_docx(template, output_path)
                 except Exception as render_error:
                     logger.error(f"Template rendering failed: {render_error}")
                     # 嘗試保存原始模板作為備份
@@ -181,13 +655,6 @@ class DocumentTransformer:
                     logger.info(f"Original template backup saved: {backup_path}")
                     raise
                 
-                # Jinja2渲染後，還需要進行成分表替換
-                logger.info("Performing ingredient table replacement after Jinja2 rendering")
-                self._replace_ingredients_tables_in_doc(output_path, data)
-                
-                # 添加淺藍底色標記到插入的資料
-                self._highlight_inserted_data(output_path, data)
-                
                 logger.info(f"Word document generated: {output_path}")
                 return True
             else:
@@ -195,17 +662,21 @@ class DocumentTransformer:
                     raise ValueError("模板不含變數且未允許回退替換模式")
                 # 關鍵詞替換模式：以 docx 文段遍歷做簡單覆寫（標籤：值 / [[key]] / <<key>> / {key}）
                 from docx import Document as DocxDocument
-                doc = DocxDocument(str(template_path))
+                doc = DocxDocument(_open_template(template_path))
 
                 # 扁平化 data 的鍵（a.b.c -> value）
+                # 以顯式堆疊走訪，子節點反向入堆以維持原本的鍵順序
                 flat: Dict[str, Any] = {}
-                def flatten(prefix: str, obj: Any):
+                stack = [("", data)]
+                while stack:
+                    prefix, obj = stack.pop()
                     if isinstance(obj, dict):
-                        for k, v in obj.items():
-                            flatten(f"{prefix}.{k}" if prefix else k, v)
+                        stack.extend(
+                            (f"{prefix}.{k}" if prefix else k, v)
+                            for k, v in reversed(list(obj.items()))
+                        )
                     else:
                         flat[prefix] = obj
-                flatten("", data)
                 
                 # 特別處理成分表資料
                 if '成分表' in data and isinstance(data['成分表'], list):
@@ -213,33 +684,33 @@ class DocumentTransformer:
                     # 為成分表創建表格替換資料
                     flat['成分表_表格'] = self._create_ingredients_table(data['成分表'])
 
-                # 可匹配的占位樣式
-                def variations(key: str) -> List[str]:
-                    k = key
-                    names = [k, k.split(".")[-1]]
-                    outs = []
-                    for n in names:
-                        outs.extend([
-                            f"[[{n}]]", f"<<{n}>>", f"{{{n}}}", f"《{n}》",
-                            f"{n}：", f"{n}: "
-                        ])
-                    return outs
+                # 可匹配的占位樣式：[[key]] / <<key>> / {key} / 《key》 以 _PLACEHOLDER_RE 單次掃描，
+                # 鍵可為完整路徑 a.b.c 或最後一段 c（先出現的鍵優先）；標籤（key：/ key:）另行處理
+                placeholder_values: Dict[str, str] = {}
+                label_values: Dict[tuple, None] = {}
+                for k, v in flat.items():
+                    value = str(v)
+                    for name in (k, k.split(".")[-1]):
+                        placeholder_values.setdefault(name, value)
+                        label_values[(f"{name}：", value)] = None
+                        label_values[(f"{name}:", value)] = None
+
+                def replace_placeholder(match) -> str:
+                    name = next(group for group in match.groups() if group)
+                    return placeholder_values.get(name, match.group(0))
+
+                def replace_tokens(text: str) -> str:
+                    new_text = _PLACEHOLDER_RE.sub(replace_placeholder, text)
+                    for label, value in label_values:
+                        if label in new_text:
+                            # 標籤：值 → 簡單策略：label 之後整行替換為 label + 值
+                            new_text = new_text.split(label, 1)[0] + label + value
+                    return new_text
 
                 # 段落替換
                 for p in doc.paragraphs:
                     text = p.text
-                    new_text = text
-                    for k, v in flat.items():
-                        for token in variations(k):
-                            if token.endswith('：') or token.endswith(': '):
-                                # 標籤：值 → 覆寫後方內容
-                                label = token.rstrip()
-                                if label in new_text:
-                                    # 簡單策略：label 之後整行替換為 label + 值
-                                    parts = new_text.split(label, 1)
-                                    new_text = parts[0] + label + str(v)
-                            else:
-                                new_text = new_text.replace(token, str(v))
+                    new_text = replace_tokens(text)
                     if new_text != text:
                         p.text = new_text
 
@@ -261,24 +732,15 @@ class DocumentTransformer:
                         for row in table.rows:
                             for cell in row.cells:
                                 txt = cell.text
-                                new_txt = txt
-                                for k, v in flat.items():
-                                    for token in variations(k):
-                                        if token.endswith('：') or token.endswith(': '):
-                                            label = token.rstrip()
-                                            if label in new_txt:
-                                                parts = new_txt.split(label, 1)
-                                                new_txt = parts[0] + label + str(v)
-                                        else:
-                                            new_txt = new_txt.replace(token, str(v))
+                                new_txt = replace_tokens(txt)
                                 if new_txt != txt:
                                     cell.text = new_txt
 
-                doc.save(str(output_path))
-                logger.info(f"Word document (keyword replacement mode) generated: {output_path}")
+                # 添加淺藍底色標記（在記憶體中完成，儲存一次即可）
+                self._highlight_inserted_data(doc, data)
                 
-                # 添加淺藍底色標記
-                self._highlight_inserted_data(Path(output_path), data)
+                _save_docx(doc, output_path)
+                logger.info(f"Word document (keyword replacement mode) generated: {output_path}")
                 
                 return True
 
@@ -287,11 +749,20 @@ class DocumentTransformer:
             # 直接拋出異常，不使用回退機制
             raise Exception(f"Word轉換失敗: {e}")
     
+    def _detect_has_jinja(self, template_path: Path) -> bool:
+        """判斷模板是否含 Jinja2 變數（元數據優先，結果依修改時間快取）"""
+        meta_path = template_path.parent / f"{template_path.stem}.json"
+        try:
+            meta_mtime_ns = meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            meta_mtime_ns = None
+        return _detect_has_jinja_cached(str(template_path), template_path.stat().st_mtime_ns, meta_mtime_ns)
+    
     def _prepare_template_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """準備模板資料，確保變數名稱匹配"""
         # 首先處理嵌套結構，將其扁平化為Profile期望的格式
-        flattened_data = self._flatten_nested_data(data)
-        template_data = flattened_data.copy()
+        # _flatten_nested_data 每次都回傳新的 dict，可直接就地修改，無需再複製
+        template_data = self._flatten_nested_data(data)
         
         # 處理成分表資料結構轉換
         if '成分表' in template_data:
@@ -345,169 +816,42 @@ class DocumentTransformer:
         """將嵌套的JSON結構扁平化為Profile期望的格式 - 通用版本"""
         flattened = {}
         
-        # 定義欄位映射規則 - 支援多種可能的欄位名稱
-        field_mappings = {
-            # 產品基本資訊映射
-            '產品名稱': [
-                '產品名稱', 'product_name', 'name', 'title', '產品標題',
-                '基本資訊.產品名稱', '產品檔案.基本資訊.產品名稱',
-                '產品基本資訊.產品名稱', '處理結果.產品檔案.基本資訊.產品名稱'
-            ],
-            '產品類別': [
-                '產品類別', 'product_category', 'category', 'type', '產品類型',
-                '基本資訊.產品類別', '產品檔案.基本資訊.產品類型',
-                '產品基本資訊.產品類型', '處理結果.產品檔案.基本資訊.產品類型'
-            ],
-            '產品劑型': [
-                '產品劑型', 'product_form', 'form', '劑型', '物理形態', '物理狀態',
-                '基本資訊.產品劑型', '產品檔案.基本資訊.物理形態',
-                '產品基本資訊.產品劑型', '處理結果.產品檔案.物理化學特性.物理狀態'
-            ],
-            '產品用途': [
-                '產品用途', 'product_use', 'use', '用途', 'intended_use',
-                '基本資訊.產品用途', '產品檔案.基本資訊.產品用途',
-                '產品基本資訊.產品用途', '處理結果.產品檔案.基本資訊.產品用途'
-            ],
-            '容量': [
-                '容量', 'volume', 'size', 'content', '包裝容量',
-                '基本資訊.容量', '產品檔案.穩定性與包裝.容量',
-                '產品基本資訊.容量', '處理結果.產品檔案.穩定性與包裝.容量'
-            ],
-            '原產地': [
-                '原產地', 'country_of_origin', 'origin', '原產國', '產地', 'country',
-                '基本資訊.原產地', '產品檔案.基本資訊.原產國',
-                '產品基本資訊.原產地', '處理結果.產品檔案.基本資訊.原產國',
-                'result.product_info.basic.country', 'result.product_info.basic.origin'
-            ],
-            # 製造商資訊映射
-            '製造商名稱': [
-                '製造商名稱', 'manufacturer_name', 'manufacturer', '製造商', '公司名稱',
-                '製造商資訊.公司名稱', '產品檔案.製造商資訊.公司名稱',
-                '廠商與負責人資訊.製造商.名稱', '處理結果.產品檔案.製造商資訊.公司名稱'
-            ],
-            '製造商地址': [
-                '製造商地址', 'manufacturer_address', 'manufacturer_addr', '地址',
-                '製造商資訊.地址', '產品檔案.製造商資訊.地址',
-                '廠商與負責人資訊.製造商.地址', '處理結果.產品檔案.製造商資訊.地址'
-            ],
-            '製造商聯絡方式': [
-                '製造商聯絡方式', 'manufacturer_contact', 'manufacturer_phone', '電話', '聯絡方式',
-                '製造商資訊.電話', '產品檔案.製造商資訊.電話',
-                '廠商與負責人資訊.製造商.電話', '處理結果.產品檔案.製造商資訊.電話'
-            ],
-            # 輸入商資訊映射
-            '輸入商名稱': [
-                '輸入商名稱', 'importer_name', 'importer', '輸入商', '責任人', '歐盟負責人',
-                '責任人資訊.公司名稱', '產品檔案.責任人資訊.公司名稱',
-                '廠商與負責人資訊.歐盟負責人.名稱', '處理結果.產品檔案.責任人資訊.公司名稱'
-            ],
-            '輸入商地址': [
-                '輸入商地址', 'importer_address', 'importer_addr',
-                '責任人資訊.地址', '產品檔案.責任人資訊.地址',
-                '廠商與負責人資訊.歐盟負責人.地址', '處理結果.產品檔案.責任人資訊.地址'
-            ],
-            '輸入商電話': [
-                '輸入商電話', 'importer_phone', 'importer_contact',
-                '責任人資訊.電話', '產品檔案.責任人資訊.電話',
-                '廠商與負責人資訊.歐盟負責人.電話', '處理結果.產品檔案.責任人資訊.電話'
-            ],
-            # 成分表映射
-            '成分表': [
-                '成分表', 'ingredients', 'ingredient_list', '成分', '完整成分表', '完整成分表(INCI)',
-                '主要成分', '成分資訊', 'ingredient_info', 'composition'
-            ],
-            # 其他資訊映射
-            '有效期限': [
-                '有效期限', 'expiry_date', 'shelf_life', '保質期', '產品保質期', '開封後保質期(PAO)',
-                '穩定性與包裝.產品保質期', '產品檔案.穩定性與包裝.產品保質期',
-                '穩定性與儲存.最短保質期', '處理結果.產品檔案.穩定性與包裝.產品保質期'
-            ],
-            '安全評估結果': [
-                '安全評估結果', 'safety_assessment', 'safety_evaluation', '安全評估結論',
-                '安全資訊.安全評估結論', '產品檔案.安全資訊.安全評估結論',
-                '處理結果.產品檔案.安全資訊.安全評估結論'
-            ],
-            '成分安全性': [
-                '成分安全性', 'ingredient_safety', 'safety_info',
-                '安全資訊.成分安全性', '產品檔案.安全資訊.成分安全性',
-                '處理結果.產品檔案.安全資訊.成分安全性'
-            ],
-            '使用限制': [
-                '使用限制', 'usage_restrictions', 'restrictions', '使用限制和禁忌',
-                '安全資訊.使用限制', '產品檔案.安全資訊.使用限制',
-                '處理結果.產品檔案.安全資訊.使用限制'
-            ],
-            '使用方式': [
-                '使用方式', 'usage_method', 'how_to_use', '使用方法', '使用注意事項',
-                '安全資訊.標籤警語.使用注意事項', '產品檔案.安全資訊.標籤警語.使用注意事項',
-                '處理結果.產品檔案.安全資訊.標籤警語.使用注意事項'
-            ],
-            '注意事項': [
-                '注意事項', 'precautions', 'warnings', '使用注意事項',
-                '安全資訊.標籤警語.使用注意事項', '產品檔案.安全資訊.標籤警語.使用注意事項',
-                '處理結果.產品檔案.安全資訊.標籤警語.使用注意事項'
-            ],
-            '使用部位': [
-                '使用部位', 'application_site', 'where_to_use', '適用部位'
-            ]
-        }
-        
         # 遞歸搜尋並提取欄位值
-        def extract_field_value(data: Dict[str, Any], field_paths: List[str]) -> Any:
-            """遞歸搜尋欄位值"""
-            for path in field_paths:
-                try:
-                    # 處理點號分隔的嵌套路徑
-                    if '.' in path:
-                        keys = path.split('.')
-                        current_data = data
-                        for key in keys:
-                            if isinstance(current_data, dict) and key in current_data:
-                                current_data = current_data[key]
-                            else:
-                                current_data = None
-                                break
-                        if current_data is not None:
-                            return current_data
-                    # 處理直接欄位名稱
-                    elif path in data:
+        def extract_field_value(data: Dict[str, Any], field_paths: List[Tuple[str, Tuple[str, ...]]]) -> Any:
+            """依預先切分的路徑搜尋欄位值"""
+            for path, keys in field_paths:
+                # 處理直接欄位名稱
+                if len(keys) == 1:
+                    if path in data:
                         return data[path]
-                except (KeyError, TypeError, AttributeError):
                     continue
-            return None
-        
-        # 遞歸搜尋所有嵌套結構
-        def recursive_search(data: Dict[str, Any], target_field: str) -> Any:
-            """遞歸搜尋目標欄位"""
-            if target_field in data:
-                return data[target_field]
-            
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    result = recursive_search(value, target_field)
-                    if result is not None:
-                        return result
-                elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict):
-                            result = recursive_search(item, target_field)
-                            if result is not None:
-                                return result
-            
+                # 處理點號分隔的嵌套路徑
+                current_data = data
+                for key in keys:
+                    if isinstance(current_data, dict) and key in current_data:
+                        current_data = current_data[key]
+                    else:
+                        current_data = None
+                        break
+                if current_data is not None:
+                    return current_data
             return None
         
         # 應用欄位映射
-        for target_field, possible_paths in field_mappings.items():
+        nested_values = None
+        for target_field, possible_paths in self._active_field_paths.items():
             value = None
             
             # 首先嘗試直接路徑搜尋
             value = extract_field_value(data, possible_paths)
             
-            # 如果沒找到，嘗試遞歸搜尋
+            # 如果沒找到，嘗試遞歸搜尋（所有簡單欄位名稱共用一次走訪結果）
             if value is None:
-                for path in possible_paths:
-                    if '.' not in path:  # 只對簡單欄位名稱進行遞歸搜尋
-                        value = recursive_search(data, path)
+                if nested_values is None:
+                    nested_values = _find_nested_keys(data, self._active_simple_field_names)
+                for path, keys in possible_paths:
+                    if len(keys) == 1:  # 只對簡單欄位名稱進行遞歸搜尋
+                        value = nested_values.get(path)
                         if value is not None:
                             break
             
@@ -534,19 +878,13 @@ class DocumentTransformer:
         if not ingredients:
             return ""
         
-        # 創建表格標題行
-        table_lines = ["INCI Name\tCas. No\tW/V%\t功能"]
-        
-        # 添加成分資料行
-        for ingredient in ingredients:
-            inci_name = ingredient.get('INCI名稱', '')
-            cas_number = ingredient.get('CAS號碼', '') or '-'
-            content = ingredient.get('含量', '')
-            function = ingredient.get('功能', '')
-            
-            table_lines.append(f"{inci_name}\t{cas_number}\t{content}\t{function}")
-        
-        return "\n".join(table_lines)
+        # 標題行與成分資料行以產生器交給 join，一次串接
+        rows = (
+            f"{ingredient.get('INCI名稱', '')}\t{ingredient.get('CAS號碼', '') or '-'}\t"
+            f"{ingredient.get('含量', '')}\t{ingredient.get('功能', '')}"
+            for ingredient in ingredients
+        )
+        return "\n".join(chain(("INCI Name\tCas. No\tW/V%\t功能",), rows))
     
     def _is_ingredients_table(self, table) -> bool:
         """檢查表格是否為成分表"""
@@ -555,10 +893,7 @@ class DocumentTransformer:
         
         # 檢查第一行是否包含成分表標題
         first_row = table.rows[0]
-        first_row_text = " ".join([cell.text.strip() for cell in first_row.cells]).lower()
-        
-        ingredients_keywords = ['inci', 'cas', 'w/v', '功能', 'ingredient', 'content']
-        return any(keyword in first_row_text for keyword in ingredients_keywords)
+        return _is_ingredients_header(tuple(cell.text.strip() for cell in first_row.cells))
     
     def _extract_ingredients_from_data(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """從數據中提取成分表資訊，支援多種格式"""
@@ -667,13 +1002,13 @@ class DocumentTransformer:
                                 standardized_item = self._standardize_ingredient_fields(item)
                                 ingredients.append(standardized_item)
                                 logger.info(f"✅ 從欄位 '{field}' 添加成分 {i+1}: {standardized_item.get('INCI名稱', 'Unknown')}")
-                        elif isinstance(item, str) and len(item.strip()) > 0:
+                        elif isinstance(item, str) and item and not item.isspace():
                             # 嘗試解析字串格式的成分
                             parsed_ingredient = self._parse_ingredient_string(item)
                             if parsed_ingredient:
                                 ingredients.append(parsed_ingredient)
                                 logger.info(f"✅ 從欄位 '{field}' 解析成分 {i+1}: {parsed_ingredient.get('INCI名稱', 'Unknown')}")
-                elif isinstance(data[field], str) and len(data[field].strip()) > 0:
+                elif isinstance(data[field], str) and data[field] and not data[field].isspace():
                     logger.info(f"🔍 欄位 '{field}' 是字串格式")
                     # 嘗試解析字串格式的成分
                     parsed_ingredient = self._parse_ingredient_string(data[field])
@@ -686,35 +1021,19 @@ class DocumentTransformer:
     
     def _standardize_ingredient_fields(self, ingredient: Dict[str, Any]) -> Dict[str, Any]:
         """標準化成分欄位名稱，確保與模板期望的格式一致"""
-        standardized = {}
-        
-        # 名稱欄位映射
-        name_fields = ['INCI名稱', 'inci_name', 'name', '成分名稱', 'ingredient_name', '成分名稱']
-        for field in name_fields:
-            if field in ingredient:
-                standardized['INCI名稱'] = ingredient[field]
-                break
+        standardized: Dict[str, Any] = {}
+        ranks: Dict[str, int] = {}
         
-        # CAS號碼欄位映射
-        cas_fields = ['CAS號碼', 'cas_number', 'cas', 'CAS', 'cas_no']
-        for field in cas_fields:
-            if field in ingredient:
-                standardized['CAS號碼'] = ingredient[field]
-                break
-        
-        # 含量欄位映射
-        content_fields = ['含量', 'content', 'percentage', '百分比', 'concentration', 'w/v%']
-        for field in content_fields:
-            if field in ingredient:
-                standardized['含量'] = ingredient[field]
-                break
-        
-        # 功能欄位映射
-        function_fields = ['功能', 'function', 'purpose', '功能說明', 'role']
-        for field in function_fields:
-            if field in ingredient:
-                standardized['功能'] = ingredient[field]
-                break
+        # 單次走訪成分的鍵，同一標準欄位有多個別名時取優先順序最高者
+        aliases = self._INGREDIENT_FIELD_ALIASES
+        for key, value in ingredient.items():
+            alias = aliases.get(key)
+            if alias is None:
+                continue
+            canonical, rank = alias
+            if canonical not in ranks or rank < ranks[canonical]:
+                ranks[canonical] = rank
+                standardized[canonical] = value
         
         # 如果沒有找到標準欄位，保留原始欄位
         if not standardized:
@@ -723,29 +1042,39 @@ class DocumentTransformer:
         logger.info(f"🔧 標準化成分欄位: {list(standardized.keys())}")
         return standardized
     
-    def _parse_ingredient_string(self, ingredient_str: str) -> Dict[str, Any]:
+    def _parse_ingredient_string(self, ingredient_str: str) -> Optional[Dict[str, str]]:
         """解析成分字串格式"""
         try:
             # 格式：Alcohol denat. (CAS: 64-17-5, 含量: 76.80000%, 功能: 抗泡劑、抗菌劑、收斂劑、遮蔽劑、溶劑、黏度控制劑)
-            import re
+            stripped = ingredient_str.strip()
+            
+            # 標準格式一次比對完成，其餘格式再逐欄位搜尋
+            full_match = _INGREDIENT_RE.match(stripped)
+            if full_match:
+                return {
+                    'INCI名稱': full_match.group('inci').strip(),
+                    'CAS號碼': full_match.group('cas').strip(),
+                    '含量': full_match.group('content').strip(),
+                    '功能': full_match.group('func').strip()
+                }
             
             # 提取INCI名稱（括號前的部分）
-            inci_match = re.match(r'^([^(]+)', ingredient_str.strip())
+            inci_match = _INCI_RE.match(stripped)
             if not inci_match:
                 return None
             
             inci_name = inci_match.group(1).strip()
             
             # 提取CAS號碼
-            cas_match = re.search(r'CAS:\s*([^,)]+)', ingredient_str)
+            cas_match = _CAS_RE.search(ingredient_str)
             cas_number = cas_match.group(1).strip() if cas_match else ''
             
             # 提取含量
-            content_match = re.search(r'含量:\s*([^,)]+)', ingredient_str)
+            content_match = _CONTENT_RE.search(ingredient_str)
             content = content_match.group(1).strip() if content_match else ''
             
             # 提取功能
-            function_match = re.search(r'功能:\s*([^)]+)', ingredient_str)
+            function_match = _FUNC_RE.search(ingredient_str)
             function = function_match.group(1).strip() if function_match else ''
             
             return {
@@ -793,11 +1122,11 @@ class DocumentTransformer:
         
         return ingredients
     
-    def _parse_tab_separated_ingredients(self, ingredient_table_str: str) -> List[Dict[str, Any]]:
+    def _parse_tab_separated_ingredients(self, ingredient_table_str: str) -> List[Dict[str, str]]:
         """解析Tab分隔的成分表格式"""
         try:
-            ingredients = []
-            lines = ingredient_table_str.strip().split('\n')
+            ingredients: List[Dict[str, str]] = []
+            lines: List[str] = ingredient_table_str.strip().split('\n')
             
             if len(lines) < 2:
                 logger.warning("成分表格式不正確，至少需要標題行和數據行")
@@ -805,35 +1134,25 @@ class DocumentTransformer:
             
             # 第一行是標題行
             header_line = lines[0]
-            headers = [h.strip() for h in header_line.split('\t')]
+            headers: List[str] = [h.strip() for h in header_line.split('\t')]
             logger.info(f"🔍 成分表標題: {headers}")
             
+            # 標題對應的標準欄位名稱只計算一次
+            column_keys: List[str] = [_classify_tab_header(header) for header in headers]
+            
             # 處理數據行
             for i, line in enumerate(lines[1:], 1):
-                if not line.strip():
+                # 只判斷是否為空白行，不另外產生去空白的字串
+                if not line or line.isspace():
                     continue
                 
-                parts = [p.strip() for p in line.split('\t')]
+                parts: List[str] = [p.strip() for p in line.split('\t')]
                 if len(parts) < len(headers):
                     logger.warning(f"第 {i} 行數據不完整: {line}")
                     continue
                 
                 # 創建成分字典
-                ingredient = {}
-                for j, header in enumerate(headers):
-                    if j < len(parts):
-                        # 將標題映射到標準欄位名稱
-                        if 'inci' in header.lower() or '名稱' in header:
-                            ingredient['INCI名稱'] = parts[j]
-                        elif 'cas' in header.lower() or '號碼' in header:
-                            ingredient['CAS號碼'] = parts[j]
-                        elif 'w/v' in header.lower() or '含量' in header or '%' in header:
-                            ingredient['含量'] = parts[j]
-                        elif '功能' in header.lower() or 'function' in header.lower():
-                            ingredient['功能'] = parts[j]
-                        else:
-                            # 使用原始標題作為鍵名
-                            ingredient[header] = parts[j]
+                ingredient: Dict[str, str] = dict(zip(column_keys, parts))
                 
                 if ingredient:
                     ingredients.append(ingredient)
@@ -846,51 +1165,40 @@ class DocumentTransformer:
             logger.error(f"解析Tab分隔成分表失敗: {e}")
             return []
     
-    def _parse_markdown_ingredients_table(self, text: str) -> List[Dict[str, Any]]:
+    def _parse_markdown_ingredients_table(self, text: str) -> List[Dict[str, str]]:
         """解析 Markdown 格式的成分表"""
-        ingredients = []
-        lines = text.split('\n')
+        ingredients: List[Dict[str, str]] = []
+        lines: List[str] = text.split('\n')
         
         in_table = False
-        headers = []
+        column_keys: List[Optional[str]] = []
         
         for line in lines:
             line = line.strip()
             
             # 檢測表格開始（必須是表頭行）
-            if '|' in line and ('成分' in line or 'inci' in line.lower() or '序號' in line) and not in_table:
+            if not in_table and '|' in line and _MD_HEADER_HINT_RE.search(line):
                 in_table = True
-                # 解析表頭
-                headers = [h.strip() for h in line.split('|') if h.strip()]
+                # 解析表頭，並一次算好各欄對應的標準欄位名稱
+                headers = [h for h in _MD_CELL_SPLIT_RE.split(line) if h]
+                column_keys = [_classify_markdown_header(header) for header in headers]
                 continue
             
-            # 檢測表格結束（分隔行）
-            if in_table and line.startswith('|') and line.count('-') >= 3:
+            # 略過表頭與資料之間的分隔行（|---|:---:|）
+            if in_table and _MD_SEPARATOR_ROW_RE.fullmatch(line):
                 continue
             
             # 解析表格行
             if in_table and line.startswith('|') and not line.startswith('|---'):
-                # 分割表格行，保留空字串
-                raw_cells = line.split('|')
-                # 移除首尾的空字串，但保留中間的空字串
-                if raw_cells and not raw_cells[0].strip():
-                    raw_cells = raw_cells[1:]
-                if raw_cells and not raw_cells[-1].strip():
-                    raw_cells = raw_cells[:-1]
-                cells = [c.strip() for c in raw_cells]
+                # 以單一正則分割並去除儲存格兩側空白；行首的 | 產生的空字串捨去，
+                # 行尾的空字串（以 | 結尾）也捨去，但保留中間的空儲存格
+                cells = _MD_CELL_SPLIT_RE.split(line)[1:]
+                if cells and not cells[-1]:
+                    cells.pop()
                 if len(cells) >= 2:  # 至少要有成分名稱
-                    ingredient = {}
-                    for i, cell in enumerate(cells):
-                        if i < len(headers):
-                            header = headers[i].lower()
-                            if '成分' in header or 'name' in header:
-                                ingredient['INCI名稱'] = cell
-                            elif 'cas' in header:
-                                ingredient['CAS號碼'] = cell
-                            elif '含量' in header or 'content' in header or 'w/v' in header:
-                                ingredient['含量'] = cell
-                            elif '功能' in header or 'function' in header or '說明' in header:
-                                ingredient['功能'] = cell
+                    ingredient: Dict[str, str] = {
+                        key: cell for key, cell in zip(column_keys, cells) if key
+                    }
                     
                     # 確保有成分名稱才添加
                     if ingredient.get('INCI名稱') and ingredient['INCI名稱'] != '成分名稱':
@@ -903,36 +1211,54 @@ class DocumentTransformer:
         if not ingredients:
             return
         
-        # 保存第一行的格式作為模板
-        format_template = None
-        if len(table.rows) > 0:
-            format_template = []
-            for cell in table.rows[0].cells:
-                cell_formats = []
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        cell_formats.append({
-                            'font_name': run.font.name,
-                            'font_size': run.font.size,
-                            'bold': run.bold,
-                            'italic': run.italic,
-                            'underline': run.underline
-                        })
-                format_template.append(cell_formats)
+        tbl = table._element
+        rows = tbl.findall(_W_TR)
+        if not rows:
+            return
+        
+        # 清空現有表格內容（保留第一行標題），直接移除 w:tr 元素，避免每刪一行就重新走訪表格
+        for tr in rows[1:]:
+            tbl.remove(tr)
+        
+        # 以第一筆資料列為範本複製新列，保留範本的儲存格格式；沒有資料列，或範本列因合併儲存格
+        # （w:gridSpan）不足四欄時，改用與 table.add_row() 相同、依表格欄位網格建立的空白列
+        # （不以標題列為範本，避免資料列帶有標題的重複標題列設定、粗體與底色）
+        template_tr = rows[1] if len(rows) > 1 else None
+        if template_tr is not None and len(template_tr.findall(_W_TC)) >= _INGREDIENTS_TABLE_COLUMNS:
+            prototype_tr = deepcopy(template_tr)
+            trPr = prototype_tr.find(_W_TR_PR)
+            if trPr is not None:
+                for tbl_header in trPr.findall(_W_TBL_HEADER):
+                    trPr.remove(tbl_header)
+        else:
+            prototype_tr = table.add_row()._tr
+            tbl.remove(prototype_tr)
         
-        # 清空現有表格內容（保留第一行標題）
-        if len(table.rows) > 1:
-            # 刪除除第一行外的所有行
-            for i in range(len(table.rows) - 1, 0, -1):
-                table._element.remove(table.rows[i]._element)
+        # 先備妥原型列：清空文字、確保前四欄各有可寫入的 w:t 並加上淺藍底色，
+        # 之後每筆成分只需複製原型列並填入文字，格式與底色隨之複製
+        for t in prototype_tr.iter(_W_T):
+            t.text = ""
         
-        # 添加新的成分資料行
+        fillable = len(prototype_tr.findall(_W_TC)) >= _INGREDIENTS_TABLE_COLUMNS
+        if fillable:
+            for cell in prototype_tr.findall(_W_TC)[:_INGREDIENTS_TABLE_COLUMNS]:
+                run = _cell_text_run(cell)
+                if run is None:
+                    continue
+                _set_run_element_text(run, "")
+                
+                # 添加淺藍色背景標記
+                try:
+                    _shade_run_element(run)
+                except Exception as e:
+                    logger.warning(f"添加背景標記失敗: {e}")
+        
+        # 添加新的成分資料行：複製原型列後只改寫 w:t 文字
+        new_rows = []
         for ingredient in ingredients:
-            new_row = table.add_row()
-            cells = new_row.cells
+            new_tr = deepcopy(prototype_tr)
             
-            if len(cells) >= 4:
-                # 替換內容並保持格式
+            if fillable:
                 ingredient_data = [
                     ingredient.get('INCI名稱', ''),
                     ingredient.get('CAS號碼', '') or '-',
@@ -940,52 +1266,33 @@ class DocumentTransformer:
                     ingredient.get('功能', '')
                 ]
                 
-                for i, (cell, content) in enumerate(zip(cells, ingredient_data)):
-                    # 清空現有內容
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.text = ""
-                    
-                    # 添加新內容
-                    if cell.paragraphs:
-                        run = cell.paragraphs[0].runs[0] if cell.paragraphs[0].runs else cell.paragraphs[0].add_run()
-                        run.text = content
-                        
-                        # 應用格式模板（如果存在）
-                        if format_template and i < len(format_template) and format_template[i]:
-                            template = format_template[i][0]  # 使用第一個run的格式
-                            if template['font_name']:
-                                run.font.name = template['font_name']
-                            if template['font_size']:
-                                run.font.size = template['font_size']
-                            if template['bold'] is not None:
-                                run.bold = template['bold']
-                            if template['italic'] is not None:
-                                run.italic = template['italic']
-                            if template['underline'] is not None:
-                                run.underline = template['underline']
-                        
-                        # 添加淺藍色背景標記
-                        try:
-                            from docx.oxml import OxmlElement
-                            shading = OxmlElement('w:shd')
-                            shading.set(qn('w:val'), 'clear')
-                            shading.set(qn('w:color'), 'auto')
-                            shading.set(qn('w:fill'), 'B4D4E6')
-                            run._element.get_or_add_rPr().append(shading)
-                        except Exception as e:
-                            logger.warning(f"添加背景標記失敗: {e}")
+                for cell, content in zip(new_tr.findall(_W_TC), ingredient_data):
+                    run = _cell_text_run(cell)
+                    if run is not None:
+                        _set_run_element_text(run, str(content))
+            
+            new_rows.append(new_tr)
+        
+        tbl.extend(new_rows)
+    
+    def _post_process_document(self, doc, data: Dict[str, Any]) -> None:
+        """渲染後處理：在記憶體中的 Document 依序替換成分表、標記插入資料（不重新開啟輸出檔）"""
+        # 成分表資料列在寫入時已標記底色，標記階段只需再檢查其標題列
+        prefilled_tables = self._replace_ingredients_tables_in_doc(doc, data)
+        self._highlight_inserted_data(doc, data, prefilled_tables)
     
-    def _replace_ingredients_tables_in_doc(self, doc_path: Path, data: Dict[str, Any]) -> None:
-        """在Word文檔中替換所有成分表表格"""
+    def _replace_ingredients_tables_in_doc(self, doc, data: Dict[str, Any]) -> set:
+        """在Word文檔（記憶體中的 Document）中替換所有成分表表格
+
+        Returns:
+            已替換內容的表格元素（w:tbl）集合
+        """
+        replaced_tables = set()
         try:
-            from docx import Document
-            doc = Document(str(doc_path))
-            
             ingredients = data.get('成分表', [])
             if not ingredients:
                 logger.info("沒有成分表資料，跳過替換")
-                return
+                return replaced_tables
             
             logger.info(f"開始替換成分表，共 {len(ingredients)} 個成分")
             
@@ -994,100 +1301,72 @@ class DocumentTransformer:
                 if self._is_ingredients_table(table):
                     logger.info(f"替換表格 {table_idx} 的成分表")
                     self._replace_ingredients_table(table, ingredients)
+                    replaced_tables.add(table._tbl)
             
-            # 保存修改後的文檔
-            doc.save(str(doc_path))
             logger.info("成分表替換完成")
             
         except Exception as e:
             logger.error(f"替換成分表失敗: {e}")
             # 不影響主要功能，只記錄錯誤
+        
+        return replaced_tables
     
-    def _highlight_inserted_data(self, output_path: Path, data: Dict[str, Any]) -> None:
-        """為插入的資料添加淺藍底色標記"""
+    def _highlight_inserted_data(self, doc, data: Dict[str, Any],
+                                 prefilled_tables: frozenset = frozenset()) -> None:
+        """為插入的資料添加淺藍底色標記（直接修改記憶體中的 Document）
+
+        Args:
+            doc: 記憶體中的 Document
+            data: 插入的資料
+            prefilled_tables: 寫入時已標記底色的表格元素，只檢查其標題列
+        """
         try:
-            from docx import Document
             from docx.shared import RGBColor
-            from docx.oxml.shared import qn
             
-            doc = Document(str(output_path))
-            
-            # 收集所有需要標記的資料值
-            data_values = set()
-            
-            def collect_values(obj: Any, prefix: str = ""):
-                """遞歸收集所有資料值"""
-                if isinstance(obj, dict):
-                    for k, v in obj.items():
-                        collect_values(v, f"{prefix}.{k}" if prefix else k)
-                elif isinstance(obj, list):
-                    for i, item in enumerate(obj):
-                        if isinstance(item, dict):
-                            collect_values(item, f"{prefix}[{i}]")
-                        else:
-                            value = str(item).strip() if item is not None else ""
-                            if value and len(value) > 2:  # 只收集長度大於2的值
-                                data_values.add(value)
-                else:
-                    value = str(obj).strip() if obj is not None else ""
-                    if value and len(value) > 2:  # 只收集長度大於2的值
-                        data_values.add(value)
-            
-            collect_values(data)
-            
-            # 特別處理成分表資料
-            ingredients_data = data.get('成分表', [])
-            if isinstance(ingredients_data, list):
-                for ingredient in ingredients_data:
-                    if isinstance(ingredient, dict):
-                        for field in ['INCI名稱', 'CAS號碼', '含量', '功能']:
-                            value = str(ingredient.get(field, '')).strip()
-                            if value and len(value) > 1:
-                                data_values.add(value)
+            # 收集所有需要標記的資料值（成分表欄位另外收集，長度門檻較低）
+            contains_value, value_count = _build_value_matcher(
+                chain(_iter_data_values(data), _iter_ingredient_values(data))
+            )
             
             # 淺藍色背景
             light_blue = RGBColor(173, 216, 230)  # 淺藍色
             
-            # 處理段落中的資料
+            # 處理段落中的資料（整段文字不含任何資料值時，其中的 run 也不可能含有，直接略過）
             for paragraph in doc.paragraphs:
+                if not contains_value(paragraph.text):
+                    continue
                 for run in paragraph.runs:
-                    run_text = run.text.strip()
-                    if run_text and any(value in run_text for value in data_values):
+                    # 資料值本身已去除首尾空白，不必為了比對再複製去空白的字串
+                    run_text = run.text
+                    if run_text and contains_value(run_text):
                         # 設置淺藍色背景
                         run.font.highlight_color = None  # 清除現有高亮
                         # 使用shading代替highlight（更明顯）
                         try:
-                            from docx.oxml import OxmlElement
-                            shading = OxmlElement('w:shd')
-                            shading.set(qn('w:val'), 'clear')
-                            shading.set(qn('w:color'), 'auto')
-                            shading.set(qn('w:fill'), 'B4D4E6')
-                            run._element.get_or_add_rPr().append(shading)
+                            _apply_shading(run)
                         except Exception as e:
                             logger.warning(f"添加背景標記失敗: {e}")
             
             # 處理表格中的資料
             for table in doc.tables:
-                for row in table.rows:
+                rows = table.rows
+                if table._tbl in prefilled_tables:
+                    rows = rows[:1]
+                for row in rows:
                     for cell in row.cells:
                         for paragraph in cell.paragraphs:
+                            if not contains_value(paragraph.text):
+                                continue
                             for run in paragraph.runs:
-                                run_text = run.text.strip()
-                                if run_text and any(value in run_text for value in data_values):
+                                run_text = run.text
+                                if run_text and contains_value(run_text):
                                     # 設置淺藍色背景
                                     try:
-                                        from docx.oxml import OxmlElement
-                                        shading = OxmlElement('w:shd')
-                                        shading.set(qn('w:val'), 'clear')
-                                        shading.set(qn('w:color'), 'auto')
-                                        shading.set(qn('w:fill'), 'B4D4E6')
-                                        run._element.get_or_add_rPr().append(shading)
+                                        _apply_shading(run)
                                     except Exception as e:
                                         logger.warning(f"添加背景標記失敗: {e}")
             
-            # 保存修改後的文檔
-            doc.save(str(output_path))
-            logger.info(f"已為插入的資料添加淺藍底色標記，共標記 {len(data_values)} 個資料值")
+            logger.info(f"已為插入的資料添加淺藍底色標記，共標記 {value_count} 個資料值")
             
         except Exception as e:
             logger.warning(f"添加淺藍底色標記失敗: {e}")
@@ -1123,34 +1402,107 @@ class DocumentTransformer:
                 logger.warning("docx2pdf未安裝，嘗試其他方法")
             
             # 嘗試使用LibreOffice
-            try:
-                import subprocess
-                result = subprocess.run([
-                    'libreoffice', '--headless', '--convert-to', 'pdf',
-                    '--outdir', str(pdf_path.parent),
-                    str(docx_path)
-                ], capture_output=True, text=True)
-                
-                if result.returncode == 0:
-                    return True
-                else:
-                    logger.error(f"LibreOffice轉換失敗: {result.stderr}")
-                    return False
-                    
-            except FileNotFoundError:
-                logger.error("LibreOffice未安裝")
-                return False
-                
+            return self._libreoffice_to_pdf(docx_path, pdf_path)
+            
         except Exception as e:
             logger.error(f"PDF轉換失敗: {e}")
             # 直接拋出異常，不使用回退機制
             raise Exception(f"PDF轉換失敗: {e}")
     
+    def _libreoffice_to_pdf(self, docx_path: Path, pdf_path: Path,
+                            profile_dir: Optional[str] = None) -> bool:
+        """以 LibreOffice 將Word文檔轉換為PDF
+        
+        Args:
+            docx_path: Word文檔路徑
+            pdf_path: PDF輸出路徑（輸出至其所在目錄）
+            profile_dir: LibreOffice 使用者設定目錄，同時執行多個 LibreOffice 時每個行程需各自獨立
+        """
+        import subprocess
+        
+        command = ['libreoffice', '--headless', '--convert-to', 'pdf',
+                   '--outdir', str(pdf_path.parent), str(docx_path)]
+        if profile_dir:
+            command.insert(1, f"-env:UserInstallation={Path(profile_dir).as_uri()}")
+        
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+        except FileNotFoundError:
+            logger.error("LibreOffice未安裝")
+            return False
+        
+        if result.returncode == 0:
+            return True
+        logger.error(f"LibreOffice轉換失敗: {result.stderr}")
+        return False
+    
+    def docx_to_pdf_many(self, jobs: Sequence[Tuple[Path, Path]],
+                         max_workers: Optional[int] = None) -> List[bool]:
+        """
+        批次將Word文檔轉換為PDF，LibreOffice 轉換以多個行程同時執行以分攤啟動時間
+        
+        Args:
+            jobs: 轉換工作列表，每項為 (Word文檔路徑, PDF輸出路徑)
+            max_workers: 同時執行的 LibreOffice 行程數，預設為CPU核心數
+            
+        Returns:
+            與 jobs 順序相同的轉換結果列表
+        """
+        try:
+            import docx2pdf  # noqa: F401
+            docx2pdf_available = True
+        except ImportError:
+            docx2pdf_available = False
+        
+        # docx2pdf 透過 Word 轉換，無法同時執行多份，維持逐一轉換
+        if len(jobs) <= 1 or docx2pdf_available:
+            return [self._docx_to_pdf(docx_path, pdf_path) for docx_path, pdf_path in jobs]
+        
+        import queue
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+        
+        workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+        
+        # 每個 LibreOffice 行程使用獨立的使用者設定目錄（同一目錄無法同時被多個行程使用），
+        # 設定目錄在工作之間重複使用，只需初始化一次
+        with tempfile.TemporaryDirectory(prefix='prodocux_lo_') as profile_root:
+            profiles: "queue.Queue[str]" = queue.Queue()
+            for i in range(workers):
+                profiles.put(os.path.join(profile_root, f"profile_{i}"))
+            
+            def convert(job: Tuple[Path, Path]) -> bool:
+                docx_path, pdf_path = job
+                profile_dir = profiles.get()
+                try:
+                    return self._libreoffice_to_pdf(Path(docx_path), Path(pdf_path), profile_dir)
+                except Exception as e:
+                    logger.error(f"PDF轉換失敗: {docx_path}, 錯誤: {e}")
+                    return False
+                finally:
+                    profiles.put(profile_dir)
+            
+            # 執行緒只負責等待子行程，實際轉換在各自的 LibreOffice 行程中平行進行
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(convert, jobs))
+    
     def _transform_to_json(self, data: Dict[str, Any], output_path: Path) -> bool:
         """轉換為JSON檔案"""
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            payload = None
+            if orjson is not None:
+                try:
+                    # orjson 直接輸出 UTF-8 bytes，縮排格式與 json.dump(indent=2) 相同
+                    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                except TypeError:
+                    # orjson 不支援的型別（如超過 64 位元的整數）交由標準庫處理
+                    payload = None
+            
+            if payload is not None:
+                output_path.write_bytes(payload)
+            else:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
             
             logger.info(f"JSON檔案已生成: {output_path}")
             return True
@@ -1199,3 +1551,14 @@ class DocumentTransformer:
             return False
 
 
+# 子行程中共用的轉換器，由 _init_transform_worker 建立
+_worker_transformer: Optional[DocumentTransformer] = None
+
+def _init_transform_worker(profile_path: Optional[str]) -> None:
+    """ProcessPoolExecutor 子行程初始化：建立該行程專用的轉換器"""
+    global _worker_transformer
+    _worker_transformer = DocumentTransformer(profile_path)
+
+def _run_transform_job(job: Tuple[Any, ...]) -> bool:
+    """在子行程中執行單一轉換工作"""
+    return _worker_transformer.transform(*job)
@@ -8,44 +8,65 @@ ProDocuX 主執行檔案
 import os
 import sys
 import subprocess
-import webbrowser
-import time
+from functools import lru_cache
 from pathlib import Path
 
-def check_dependencies():
+# 是否為打包後的可執行檔（啟動時即已確定）
+_FROZEN = getattr(sys, 'frozen', False)
+
+# DesktopManager 延遲載入，首次使用時才匯入並快取
+_DesktopManager = None
+
+def _get_desktop_manager_cls():
+    """取得 DesktopManager 類別（只匯入一次）"""
+    global _DesktopManager
+    if _DesktopManager is None:
+        from utils.desktop_manager import DesktopManager
+        _DesktopManager = DesktopManager
+    return _DesktopManager
+
+def _first_env(*names):
+    """依序取得第一個有值（非空字串）的環境變數"""
+    env = os.environ
+    return next((env[name] for name in names if env.get(name)), None)
+
+# 必要套件：{pip 套件名稱: 匯入模組名稱}
+REQUIRED_PACKAGES = {
+    'flask': 'flask',
+    'openai': 'openai',
+    'pdfplumber': 'pdfplumber',
+    'python-docx': 'docx',
+    'docxtpl': 'docxtpl',
+    'pyyaml': 'yaml',
+    'pydantic': 'pydantic',
+    'python-dotenv': 'dotenv',
+    'docx2pdf': 'docx2pdf'
+}
+
+def check_dependencies(user_lang=None):
     """檢查並安裝依賴套件"""
     # 如果是打包後的可執行檔，跳過依賴檢查
-    if getattr(sys, 'frozen', False):
-        user_lang = get_user_language()
+    if _FROZEN:
+        user_lang = user_lang or get_user_language()
         print(get_message('packaged_version', user_lang))
         return True
     
-    required_packages = [
-        'flask',
-        'openai',
-        'pdfplumber',
-        'python-docx',
-        'docxtpl',
-        'pyyaml',
-        'pydantic',
-        'python-dotenv',
-        'docx2pdf'
-    ]
-    
-    missing_packages = []
+    from importlib.util import find_spec
     
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing_packages.append(package)
+    # 只查詢模組是否存在，不實際執行匯入（避免載入 flask、openai 等大型套件）
+    missing_packages = [
+        package for package, module in REQUIRED_PACKAGES.items()
+        if find_spec(module) is None
+    ]
     
     if missing_packages:
         print("正在安裝依賴套件...")
         try:
+            # 略過 pip 版本檢查（避免額外的網路請求）並停用互動提示
             subprocess.check_call([
-                sys.executable, "-m", "pip", "install", 
-                *missing_packages, "--quiet"
+                sys.executable, "-m", "pip", "install",
+                "--quiet", "--disable-pip-version-check", "--no-input",
+                *missing_packages
             ])
             print("依賴套件安裝完成")
         except subprocess.CalledProcessError as e:
@@ -54,27 +75,26 @@ def check_dependencies():
     
     return True
 
-def check_api_key():
+def check_api_key(user_lang=None):
     """檢查API金鑰設定"""
     # 先檢查環境變數
-    api_key = os.getenv('OPENAI_API_KEY') or os.getenv('IOPENAI_API_KEY')
+    api_key = _first_env('OPENAI_API_KEY', 'IOPENAI_API_KEY')
     
     if not api_key:
         # 嘗試從工作空間載入.env檔案
         try:
-            from utils.desktop_manager import DesktopManager
-            desktop_manager = DesktopManager()
+            desktop_manager = _get_desktop_manager_cls()()
             env_file = desktop_manager.workspace_dir / ".env"
             
             if env_file.exists():
                 from dotenv import load_dotenv
                 load_dotenv(env_file)
-                api_key = os.getenv('OPENAI_API_KEY') or os.getenv('IOPENAI_API_KEY')
+                api_key = _first_env('OPENAI_API_KEY', 'IOPENAI_API_KEY')
         except Exception:
             pass
     
     if not api_key:
-        user_lang = get_user_language()
+        user_lang = user_lang or get_user_language()
         print(get_message('no_api_key', user_lang))
         print(get_message('api_key_help', user_lang))
         print(get_message('env_vars', user_lang))
@@ -82,13 +102,11 @@ def check_api_key():
     
     return True
 
-def create_directories():
+def create_directories(user_lang=None):
     """創建必要的目錄"""
-    user_lang = get_user_language()
+    user_lang = user_lang or get_user_language()
     try:
-        from utils.desktop_manager import DesktopManager
-        
-        desktop_manager = DesktopManager()
+        desktop_manager = _get_desktop_manager_cls()()
         workspace_dirs = desktop_manager.setup_workspace()
         
         print(f"{get_message('workspace_ready', user_lang)}: {desktop_manager.workspace_dir}")
@@ -101,13 +119,13 @@ def create_directories():
     except Exception as e:
         print(f"目錄創建失敗: {e}")
         # 對於打包版本，不應該在 dist 目錄創建檔案
-        if getattr(sys, 'frozen', False):
+        if _FROZEN:
             print("打包版本無法創建目錄，請手動設定工作空間")
             return False
         
         # 回退到傳統方式（僅限開發環境）
         # 對於打包版本，不應該在 dist 目錄創建這些目錄
-        if not getattr(sys, 'frozen', False):
+        if not _FROZEN:
             directories = [
                 'uploads',
                 'outputs', 
@@ -119,16 +137,16 @@ def create_directories():
             ]
             
             for directory in directories:
-                Path(directory).mkdir(parents=True, exist_ok=True)
+                os.makedirs(directory, exist_ok=True)
         
         print("目錄結構已準備完成（傳統模式）")
         return True
 
-def create_env_file():
+def create_env_file(user_lang=None):
     """創建環境變數範例檔案"""
-    user_lang = get_user_language()
+    user_lang = user_lang or get_user_language()
     # 對於打包版本，不應該在 dist 目錄創建 .env 檔案
-    if getattr(sys, 'frozen', False):
+    if _FROZEN:
         print(get_message('skip_env_creation', user_lang))
         return
     
@@ -172,9 +190,9 @@ CONFIDENCE_THRESHOLD=0.7
 """)
             print("已創建 .env 範例檔案，請填入您的API金鑰")
 
-def start_web_app():
+def start_web_app(user_lang=None):
     """啟動Web應用"""
-    user_lang = get_user_language()
+    user_lang = user_lang or get_user_language()
     try:
         from web.app import create_app
         
@@ -184,15 +202,20 @@ def start_web_app():
         print(get_message('browser_open', user_lang))
         print(get_message('stop_service', user_lang))
         
-        # 延遲開啟瀏覽器
-        def open_browser():
-            time.sleep(2)
-            webbrowser.open('http://localhost:5000')
-        
+        # 延遲開啟瀏覽器（僅啟動Web服務時才需要的模組在此載入）
         import threading
-        browser_thread = threading.Thread(target=open_browser)
-        browser_thread.daemon = True
-        browser_thread.start()
+        import webbrowser
+        
+        # 先解析預設瀏覽器，避免在 Flask 啟動期間才搜尋可用的瀏覽器；找不到時（如無桌面環境）略過
+        try:
+            browser = webbrowser.get()
+        except webbrowser.Error:
+            browser = None
+        
+        if browser is not None:
+            browser_timer = threading.Timer(2.0, browser.open, args=('http://localhost:5000',))
+            browser_timer.daemon = True
+            browser_timer.start()
         
         app.run(host='0.0.0.0', port=5000, debug=False)
         
@@ -202,28 +225,36 @@ def start_web_app():
     except Exception as e:
         print(f"應用啟動失敗: {e}")
 
+# 中文語言識別字串
+_ZH_INDICATORS = (
+    'zh', 'chinese', 'taiwan', 'traditional', 'simplified',
+    'china', 'hong kong', 'macau', 'singapore', 'malaysia',
+    'zh-cn', 'zh-tw', 'zh-hk', 'zh-sg', 'zh-mo',
+    'zh_hans', 'zh_hant', 'zh_hans_cn', 'zh_hant_tw',
+    'chinese_traditional', 'chinese_simplified',
+    '繁體', '簡體', '中文', '中國', '台灣', '香港', '澳門'
+)
+_ZH_RE = None
+
 def is_chinese_language(lang_string):
     """檢查是否為中文語言"""
+    global _ZH_RE
     if not lang_string:
         return False
     
-    lang_lower = lang_string.lower()
-    zh_indicators = [
-        'zh', 'chinese', 'taiwan', 'traditional', 'simplified',
-        'china', 'hong kong', 'macau', 'singapore', 'malaysia',
-        'zh-cn', 'zh-tw', 'zh-hk', 'zh-sg', 'zh-mo',
-        'zh_hans', 'zh_hant', 'zh_hans_cn', 'zh_hant_tw',
-        'chinese_traditional', 'chinese_simplified',
-        '繁體', '簡體', '中文', '中國', '台灣', '香港', '澳門'
-    ]
-    return any(zh_code in lang_lower for zh_code in zh_indicators)
+    # 首次呼叫時才將識別字串編譯成單一正則，之後一次掃描即可判斷
+    if _ZH_RE is None:
+        import re
+        _ZH_RE = re.compile('|'.join(map(re.escape, _ZH_INDICATORS)))
+    return bool(_ZH_RE.search(lang_string.lower()))
 
+@lru_cache(maxsize=1)
 def get_user_language():
-    """檢測使用者語言"""
+    """檢測使用者語言（每次執行只檢測一次）"""
     import locale
     try:
         # 檢查環境變數
-        lang = os.getenv('LANG') or os.getenv('LC_ALL') or os.getenv('LC_CTYPE')
+        lang = _first_env('LANG', 'LC_ALL', 'LC_CTYPE')
         if is_chinese_language(lang):
             return 'zh_TW'
         
@@ -245,69 +276,71 @@ def get_user_language():
     except:
         return 'en'
 
+# 本地化訊息（模組載入時建立一次）
+_MESSAGES = {
+    'zh_TW': {
+        'title': 'ProDocuX - AI文檔智能轉換平台',
+        'first_run_detected': '檢測到首次啟動，正在進行初始設定...',
+        'setup_requirements': '為了確保ProDocuX正常運作，我們需要完成以下設定：',
+        'step1': '   1. 工作空間目錄設定',
+        'step2': '   2. AI提供者選擇',
+        'step3': '   3. API金鑰配置',
+        'step4': '   4. 桌面快捷方式選擇',
+        'setup_methods': '建議使用以下方式進行設定：',
+        'method1': '   方法1: 運行 \'python simple_setup.py\' 進行命令行設定',
+        'method2': '   方法2: 啟動Web介面後在設定頁面中配置',
+        'starting_web': '正在啟動Web設定介面...',
+        'browser_url': '   請在瀏覽器中前往: http://localhost:5000/setup',
+        'starting_app': '啟動ProDocuX Web應用...',
+        'packaged_version': '檢測到打包版本，跳過依賴檢查',
+        'workspace_ready': '工作目錄已準備完成',
+        'desktop_detected': '桌面環境檢測完成，已創建專用工作目錄',
+        'skip_env_creation': '打包版本跳過 .env 檔案創建，請在工作空間中設定',
+        'no_api_key': '未設定OpenAI API金鑰',
+        'api_key_help': '請在首次啟動時設定API金鑰，或手動設定環境變數',
+        'env_vars': '環境變數: OPENAI_API_KEY 或 IOPENAI_API_KEY',
+        'no_api_key_web': '未設定API金鑰，將啟動Web應用讓您在設定頁面中配置',
+        'api_key_web_help': '您可以在Web介面的設定頁面中輸入API金鑰',
+        'starting_web_service': '啟動ProDocuX Web服務...',
+        'browser_open': '請在瀏覽器開啟: http://localhost:5000',
+        'stop_service': '按 Ctrl+C 停止服務',
+        'thanks': '感謝使用ProDocuX！',
+        'error': '發生錯誤'
+    },
+    'en': {
+        'title': 'ProDocuX - AI Document Intelligence Platform',
+        'first_run_detected': 'First launch detected, initializing setup...',
+        'setup_requirements': 'To ensure ProDocuX works properly, we need to complete the following setup:',
+        'step1': '   1. Workspace directory setup',
+        'step2': '   2. AI provider selection',
+        'step3': '   3. API key configuration',
+        'step4': '   4. Desktop shortcuts selection',
+        'setup_methods': 'Recommended setup methods:',
+        'method1': '   Method 1: Run \'python simple_setup.py\' for command line setup',
+        'method2': '   Method 2: Configure in settings page after starting web interface',
+        'starting_web': 'Starting web setup interface...',
+        'browser_url': '   Please visit in browser: http://localhost:5000/setup',
+        'starting_app': 'Starting ProDocuX Web application...',
+        'packaged_version': 'Packaged version detected, skipping dependency check',
+        'workspace_ready': 'Workspace directory ready',
+        'desktop_detected': 'Desktop environment detected, created dedicated workspace',
+        'skip_env_creation': 'Packaged version skips .env file creation, please configure in workspace',
+        'no_api_key': 'OpenAI API key not set',
+        'api_key_help': 'Please set API key during first launch, or manually set environment variables',
+        'env_vars': 'Environment variables: OPENAI_API_KEY or IOPENAI_API_KEY',
+        'no_api_key_web': 'No API key set, will start web application for configuration',
+        'api_key_web_help': 'You can enter API key in the web interface settings page',
+        'starting_web_service': 'Starting ProDocuX Web service...',
+        'browser_open': 'Please open in browser: http://localhost:5000',
+        'stop_service': 'Press Ctrl+C to stop service',
+        'thanks': 'Thank you for using ProDocuX!',
+        'error': 'An error occurred'
+    }
+}
+
 def get_message(key, lang):
     """獲取本地化訊息"""
-    messages = {
-        'zh_TW': {
-            'title': 'ProDocuX - AI文檔智能轉換平台',
-            'first_run_detected': '檢測到首次啟動，正在進行初始設定...',
-            'setup_requirements': '為了確保ProDocuX正常運作，我們需要完成以下設定：',
-            'step1': '   1. 工作空間目錄設定',
-            'step2': '   2. AI提供者選擇',
-            'step3': '   3. API金鑰配置',
-            'step4': '   4. 桌面快捷方式選擇',
-            'setup_methods': '建議使用以下方式進行設定：',
-            'method1': '   方法1: 運行 \'python simple_setup.py\' 進行命令行設定',
-            'method2': '   方法2: 啟動Web介面後在設定頁面中配置',
-            'starting_web': '正在啟動Web設定介面...',
-            'browser_url': '   請在瀏覽器中前往: http://localhost:5000/setup',
-            'starting_app': '啟動ProDocuX Web應用...',
-            'packaged_version': '檢測到打包版本，跳過依賴檢查',
-            'workspace_ready': '工作目錄已準備完成',
-            'desktop_detected': '桌面環境檢測完成，已創建專用工作目錄',
-            'skip_env_creation': '打包版本跳過 .env 檔案創建，請在工作空間中設定',
-            'no_api_key': '未設定OpenAI API金鑰',
-            'api_key_help': '請在首次啟動時設定API金鑰，或手動設定環境變數',
-            'env_vars': '環境變數: OPENAI_API_KEY 或 IOPENAI_API_KEY',
-            'no_api_key_web': '未設定API金鑰，將啟動Web應用讓您在設定頁面中配置',
-            'api_key_web_help': '您可以在Web介面的設定頁面中輸入API金鑰',
-            'starting_web_service': '啟動ProDocuX Web服務...',
-            'browser_open': '請在瀏覽器開啟: http://localhost:5000',
-            'stop_service': '按 Ctrl+C 停止服務',
-            'thanks': '感謝使用ProDocuX！',
-            'error': '發生錯誤'
-        },
-        'en': {
-            'title': 'ProDocuX - AI Document Intelligence Platform',
-            'first_run_detected': 'First launch detected, initializing setup...',
-            'setup_requirements': 'To ensure ProDocuX works properly, we need to complete the following setup:',
-            'step1': '   1. Workspace directory setup',
-            'step2': '   2. AI provider selection',
-            'step3': '   3. API key configuration',
-            'step4': '   4. Desktop shortcuts selection',
-            'setup_methods': 'Recommended setup methods:',
-            'method1': '   Method 1: Run \'python simple_setup.py\' for command line setup',
-            'method2': '   Method 2: Configure in settings page after starting web interface',
-            'starting_web': 'Starting web setup interface...',
-            'browser_url': '   Please visit in browser: http://localhost:5000/setup',
-            'starting_app': 'Starting ProDocuX Web application...',
-            'packaged_version': 'Packaged version detected, skipping dependency check',
-            'workspace_ready': 'Workspace directory ready',
-            'desktop_detected': 'Desktop environment detected, created dedicated workspace',
-            'skip_env_creation': 'Packaged version skips .env file creation, please configure in workspace',
-            'no_api_key': 'OpenAI API key not set',
-            'api_key_help': 'Please set API key during first launch, or manually set environment variables',
-            'env_vars': 'Environment variables: OPENAI_API_KEY or IOPENAI_API_KEY',
-            'no_api_key_web': 'No API key set, will start web application for configuration',
-            'api_key_web_help': 'You can enter API key in the web interface settings page',
-            'starting_web_service': 'Starting ProDocuX Web service...',
-            'browser_open': 'Please open in browser: http://localhost:5000',
-            'stop_service': 'Press Ctrl+C to stop service',
-            'thanks': 'Thank you for using ProDocuX!',
-            'error': 'An error occurred'
-        }
-    }
-    return messages.get(lang, messages['en']).get(key, key)
+    return _MESSAGES.get(lang, _MESSAGES['en']).get(key, key)
 
 def main():
     """主函數"""
@@ -338,31 +371,40 @@ def main():
     else:
         print(msg('starting_app', user_lang))
     
-    # 檢查依賴
-    if not check_dependencies():
-        print("依賴檢查失敗，請手動安裝依賴套件")
-        print("執行: pip install -r requirements.txt")
-        return
-    
-    # 創建目錄
-    create_directories()
-    
-    # 創建環境變數檔案
-    create_env_file()
+    if _FROZEN:
+        # 打包版本已內建依賴，且不在 dist 目錄創建 .env，只需準備工作空間
+        print(msg('packaged_version', user_lang))
+        create_directories(user_lang)
+    else:
+        # 檢查依賴
+        if not check_dependencies(user_lang):
+            print("依賴檢查失敗，請手動安裝依賴套件")
+            print("執行: pip install -r requirements.txt")
+            return
+        
+        # 創建目錄
+        create_directories(user_lang)
+        
+        # 創建環境變數檔案
+        create_env_file(user_lang)
     
     # 檢查API金鑰
-    if not check_api_key():
+    if not check_api_key(user_lang):
         print(f"\n{get_message('no_api_key_web', user_lang)}")
         print(get_message('api_key_web_help', user_lang))
     
     # 啟動應用
-    start_web_app()
+    start_web_app(user_lang)
 
 def is_first_run():
     """檢查是否為首次運行"""
+    # 已指定工作空間（simple_setup 設定）時直接檢查設定檔案，不必建立 DesktopManager
+    workspace = os.environ.get('PRODOCUX_WORKSPACE')
+    if workspace:
+        return not os.path.exists(os.path.join(workspace, "startup_config.json"))
+    
     try:
-        from utils.desktop_manager import DesktopManager
-        desktop_manager = DesktopManager()
+        desktop_manager = _get_desktop_manager_cls()()
         
         # 檢查設定檔案
         config_file = desktop_manager.workspace_dir / "startup_config.json"
@@ -372,6 +414,10 @@ def is_first_run():
         return True
 
 if __name__ == "__main__":
+    # 打包版本中 ProcessPoolExecutor 的子行程會重新執行此入口，需先交由 multiprocessing 處理，
+    # 否則每個子行程都會再啟動一次網頁伺服器
+    import multiprocessing
+    multiprocessing.freeze_support()
     try:
         main()
     except KeyboardInterrupt:
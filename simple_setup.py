@@ -6,10 +6,40 @@ ProDocuX 簡化啟動設定
 """
 
 import os
+import re
 import sys
-import json
 from pathlib import Path
 
+# orjson 為可選的加速套件，未安裝時使用標準庫 json（輸出格式相同）
+try:
+    import orjson
+    
+    def _dumps_config(config):
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2).decode('utf-8')
+except ImportError:
+    import json
+    
+    def _dumps_config(config):
+        return json.dumps(config, ensure_ascii=False, indent=2)
+
+# 使用者家目錄
+_HOME = os.path.expanduser('~')
+
+# 環境變數範例檔案（與本程式同目錄）
+_ENV_EXAMPLE = Path(__file__).parent / "env_example.txt"
+
+# 各AI提供者在 .env 中對應的 (API金鑰變數, 模型變數)
+_PROVIDER_ENV_KEYS = {
+    'openai': (('OPENAI_API_KEY', 'IOPENAI_API_KEY'), ('OPENAI_MODEL', 'IOPENAI_MODEL')),
+    'claude': (('CLAUDE_API_KEY',), ('CLAUDE_MODEL',)),
+    'gemini': (('GEMINI_API_KEY',), ('GEMINI_MODEL',)),
+    'grok': (('GROK_API_KEY',), ('GROK_MODEL',)),
+    'microsoft': (('COPILOT_API_KEY',), ('COPILOT_MODEL',))
+}
+
+# .env 的設定行（KEY=value）
+_ENV_LINE_RE = re.compile(r'^([A-Z_]+)=[^\r\n]*', re.MULTILINE)
+
 def show_welcome():
     """顯示歡迎訊息"""
     print("=" * 60)
@@ -38,11 +68,11 @@ def get_workspace_path():
     print()
     
     # 預設路徑
-    documents_dir = Path.home() / "Documents"
-    if not documents_dir.exists():
-        documents_dir = Path.home() / "文檔"
+    documents_dir = os.path.join(_HOME, "Documents")
+    if not os.path.isdir(documents_dir):
+        documents_dir = os.path.join(_HOME, "文檔")
     
-    default_path = documents_dir / "ProDocuX_Workspace"
+    default_path = Path(documents_dir) / "ProDocuX_Workspace"
     print(f"💡 建議位置: {default_path}")
     print("   (這是您的文檔資料夾，方便找到)")
     print()
@@ -118,39 +148,40 @@ def get_ai_provider():
             print("❌ 請輸入 1-5")
         print()
 
+# AI提供者資訊：名稱、API金鑰申請網址、金鑰前綴
+PROVIDER_INFO = {
+    'openai': {
+        'name': 'OpenAI',
+        'urls': ['https://platform.openai.com/api-keys', 'https://iopena.com/'],
+        'prefixes': ('sk-', 'iopena-')
+    },
+    'claude': {
+        'name': 'Claude',
+        'urls': ['https://console.anthropic.com/'],
+        'prefixes': ('sk-ant-',)
+    },
+    'gemini': {
+        'name': 'Gemini',
+        'urls': ['https://makersuite.google.com/app/apikey'],
+        'prefixes': ('AI',)
+    },
+    'grok': {
+        'name': 'Grok',
+        'urls': ['https://console.x.ai/', 'https://x.ai/'],
+        'prefixes': ('xai-', 'grok-')
+    },
+    'microsoft': {
+        'name': 'Microsoft Copilot',
+        'urls': ['https://portal.azure.com/', 'https://azure.microsoft.com/services/cognitive-services/openai-service/'],
+        'prefixes': ('sk-', 'azure-')
+    }
+}
+
 def get_api_keys(provider):
     """獲取API金鑰"""
     print(f"\n🔑 {provider.upper()} API金鑰設定")
     
-    provider_info = {
-        'openai': {
-            'name': 'OpenAI',
-            'urls': ['https://platform.openai.com/api-keys', 'https://iopena.com/'],
-            'prefixes': ['sk-', 'iopena-']
-        },
-        'claude': {
-            'name': 'Claude',
-            'urls': ['https://console.anthropic.com/'],
-            'prefixes': ['sk-ant-']
-        },
-        'gemini': {
-            'name': 'Gemini',
-            'urls': ['https://makersuite.google.com/app/apikey'],
-            'prefixes': ['AI']
-        },
-        'grok': {
-            'name': 'Grok',
-            'urls': ['https://console.x.ai/', 'https://x.ai/'],
-            'prefixes': ['xai-', 'grok-']
-        },
-        'microsoft': {
-            'name': 'Microsoft Copilot',
-            'urls': ['https://portal.azure.com/', 'https://azure.microsoft.com/services/cognitive-services/openai-service/'],
-            'prefixes': ['sk-', 'azure-']
-        }
-    }
-    
-    info = provider_info.get(provider, {'name': provider.upper(), 'urls': [], 'prefixes': []})
+    info = PROVIDER_INFO.get(provider, {'name': provider.upper(), 'urls': [], 'prefixes': ()})
     
     print(f"您可以在以下位置獲取{info['name']} API金鑰：")
     for url in info['urls']:
@@ -169,12 +200,8 @@ def get_api_keys(provider):
             print("❌ API金鑰格式不正確，請檢查後重新輸入")
             continue
         
-        # 驗證API金鑰格式
-        valid_format = False
-        for prefix in info['prefixes']:
-            if api_key.startswith(prefix):
-                valid_format = True
-                break
+        # 驗證API金鑰格式（startswith 可直接比對多個前綴）
+        valid_format = api_key.startswith(info['prefixes'])
         
         if valid_format:
             print(f"✅ {info['name']} API金鑰格式正確")
@@ -246,95 +273,77 @@ def show_workspace_info(workspace_path, selected_shortcuts, ai_config):
 def save_setup(workspace_path, selected_shortcuts, ai_config):
     """保存設定"""
     try:
-        # 創建工作目錄
+        # 創建工作目錄及子目錄（makedirs 會一併建立工作目錄本身）
         workspace_dir = Path(workspace_path)
-        workspace_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 創建子目錄
-        subdirs = ["input", "output", "templates", "cache", "profiles", "prompts"]
-        for subdir in subdirs:
-            (workspace_dir / subdir).mkdir(exist_ok=True)
+        base = str(workspace_dir)
+        for subdir in ("input", "output", "templates", "cache", "profiles", "prompts"):
+            os.makedirs(os.path.join(base, subdir), exist_ok=True)
         
         # 複製env_example.txt到工作空間並更新API金鑰
-        env_example_file = Path(__file__).parent / "env_example.txt"
         env_file = workspace_dir / ".env"
         
-        if env_example_file.exists():
-            # 讀取範例檔案
-            with open(env_example_file, 'r', encoding='utf-8') as f:
-                env_content = f.read()
-            
-            # 替換API金鑰
-            if ai_config['provider'] == 'openai':
-                env_content = env_content.replace('your_openai_api_key_here', ai_config['api_key'])
-                env_content = env_content.replace('your_iopenai_api_key_here', ai_config['api_key'])
-            else:
-                env_content = env_content.replace('your_openai_api_key_here', 'your_openai_api_key_here')
-                env_content = env_content.replace('your_iopenai_api_key_here', 'your_iopenai_api_key_here')
-            
-            if ai_config['provider'] == 'claude':
-                env_content = env_content.replace('your_claude_api_key_here', ai_config['api_key'])
-            else:
-                env_content = env_content.replace('your_claude_api_key_here', 'your_claude_api_key_here')
-            
-            if ai_config['provider'] == 'gemini':
-                env_content = env_content.replace('your_gemini_api_key_here', ai_config['api_key'])
-            else:
-                env_content = env_content.replace('your_gemini_api_key_here', 'your_gemini_api_key_here')
-            
-            if ai_config['provider'] == 'grok':
-                env_content = env_content.replace('your_grok_api_key_here', ai_config['api_key'])
-            else:
-                env_content = env_content.replace('your_grok_api_key_here', 'your_grok_api_key_here')
+        if _ENV_EXAMPLE.is_file():
+            # 讀取範例檔案，以單次掃描更新所選提供者的API金鑰與模型設定後直接寫入.env，其餘設定保持不變
+            key_names, model_names = _PROVIDER_ENV_KEYS.get(ai_config['provider'], ((), ()))
+            env_values = dict.fromkeys(key_names, ai_config['api_key'])
+            env_values.update(dict.fromkeys(model_names, ai_config['model']))
             
-            if ai_config['provider'] == 'microsoft':
-                env_content = env_content.replace('your_copilot_api_key_here', ai_config['api_key'])
-            else:
-                env_content = env_content.replace('your_copilot_api_key_here', 'your_copilot_api_key_here')
+            def replace_env_line(match):
+                name = match.group(1)
+                return f"{name}={env_values[name]}" if name in env_values else match.group(0)
             
-            # 更新模型設定
-            if ai_config['provider'] == 'openai':
-                env_content = env_content.replace('gpt-4', ai_config['model'])
-            elif ai_config['provider'] == 'claude':
-                env_content = env_content.replace('claude-3-sonnet-20240229', ai_config['model'])
-            elif ai_config['provider'] == 'gemini':
-                env_content = env_content.replace('gemini-pro', ai_config['model'])
-            elif ai_config['provider'] == 'grok':
-                env_content = env_content.replace('grok-beta', ai_config['model'])
-            elif ai_config['provider'] == 'microsoft':
-                env_content = env_content.replace('copilot-gpt-4', ai_config['model'])
-            
-            # 寫入.env檔案
-            with open(env_file, 'w', encoding='utf-8') as f:
-                f.write(env_content)
+            env_file.write_text(
+                _ENV_LINE_RE.sub(replace_env_line, _ENV_EXAMPLE.read_text(encoding='utf-8')),
+                encoding='utf-8'
+            )
         else:
             # 如果沒有範例檔案，創建基本.env檔案
+            # 未選擇的提供者使用預設值，所選提供者填入其API金鑰與模型
+            provider = ai_config['provider']
+            api_keys = {
+                'openai': 'sk-your-key-here',
+                'claude': 'sk-ant-your-key-here',
+                'gemini': 'AI-your-key-here',
+                'grok': 'grok-your-key-here',
+                'microsoft': 'copilot-your-key-here'
+            }
+            models = {
+                'openai': 'gpt-4o',
+                'claude': 'claude-3-5-sonnet-20241022',
+                'gemini': 'gemini-2.5-pro',
+                'grok': 'grok-2',
+                'microsoft': 'copilot-gpt-4-turbo'
+            }
+            if provider in api_keys:
+                api_keys[provider] = ai_config['api_key']
+                models[provider] = ai_config['model']
+            
             with open(env_file, 'w', encoding='utf-8') as f:
                 f.write(f"""# ProDocuX 環境變數設定
 # 此檔案由ProDocuX自動生成，請勿手動修改
 
 # OpenAI API設定
-OPENAI_API_KEY={'sk-your-key-here' if ai_config['provider'] != 'openai' else ai_config['api_key']}
-IOPENAI_API_KEY={'sk-your-key-here' if ai_config['provider'] != 'openai' else ai_config['api_key']}
+OPENAI_API_KEY={api_keys['openai']}
+IOPENAI_API_KEY={api_keys['openai']}
 
 # Claude API設定
-CLAUDE_API_KEY={'sk-ant-your-key-here' if ai_config['provider'] != 'claude' else ai_config['api_key']}
+CLAUDE_API_KEY={api_keys['claude']}
 
 # Gemini API設定
-GEMINI_API_KEY={'AI-your-key-here' if ai_config['provider'] != 'gemini' else ai_config['api_key']}
+GEMINI_API_KEY={api_keys['gemini']}
 
 # Grok API設定
-GROK_API_KEY={'grok-your-key-here' if ai_config['provider'] != 'grok' else ai_config['api_key']}
+GROK_API_KEY={api_keys['grok']}
 
 # Microsoft Copilot API設定
-COPILOT_API_KEY={'copilot-your-key-here' if ai_config['provider'] != 'microsoft' else ai_config['api_key']}
+COPILOT_API_KEY={api_keys['microsoft']}
 
 # 模型設定
-OPENAI_MODEL={ai_config['model'] if ai_config['provider'] == 'openai' else 'gpt-4o'}
-CLAUDE_MODEL={ai_config['model'] if ai_config['provider'] == 'claude' else 'claude-3-5-sonnet-20241022'}
-GEMINI_MODEL={ai_config['model'] if ai_config['provider'] == 'gemini' else 'gemini-2.5-pro'}
-GROK_MODEL={ai_config['model'] if ai_config['provider'] == 'grok' else 'grok-2'}
-COPILOT_MODEL={ai_config['model'] if ai_config['provider'] == 'microsoft' else 'copilot-gpt-4-turbo'}
+OPENAI_MODEL={models['openai']}
+CLAUDE_MODEL={models['claude']}
+GEMINI_MODEL={models['gemini']}
+GROK_MODEL={models['grok']}
+COPILOT_MODEL={models['microsoft']}
 
 # 其他設定
 MAX_CHUNK_SIZE=8000
@@ -352,8 +361,7 @@ CONFIDENCE_THRESHOLD=0.7
         }
         
         config_file = workspace_dir / "startup_config.json"
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        config_file.write_text(_dumps_config(config), encoding='utf-8')
         
         # 創建說明檔案
         create_readme(workspace_dir, selected_shortcuts)
@@ -370,7 +378,7 @@ def create_readme(workspace_dir, selected_shortcuts):
     try:
         from datetime import datetime
         
-        readme_content = f"""# ProDocuX 工作目錄
+        header = """# ProDocuX 工作目錄
 
 這是ProDocuX的工作目錄，包含以下資料夾：
 
@@ -396,10 +404,7 @@ def create_readme(workspace_dir, selected_shortcuts):
             "template": "模板資料夾"
         }
         
-        for shortcut in selected_shortcuts:
-            readme_content += f"- \"ProDocuX {shortcut_names.get(shortcut, shortcut)}\"\n"
-        
-        readme_content += f"""
+        footer = f"""
 ### 方法2：手動開啟資料夾
 1. 開啟檔案總管
 2. 在地址欄輸入：{workspace_dir}
@@ -423,6 +428,15 @@ ProDocuX v1.0.0
 工作目錄路徑: {workspace_dir}
 """
         
+        # 各段落組合後一次合併，避免在迴圈中重複串接字串
+        parts = [header]
+        parts.extend(
+            f"- \"ProDocuX {shortcut_names.get(shortcut, shortcut)}\"\n"
+            for shortcut in selected_shortcuts
+        )
+        parts.append(footer)
+        readme_content = "".join(parts)
+        
         readme_file = workspace_dir / "README.txt"
         with open(readme_file, 'w', encoding='utf-8') as f:
             f.write(readme_content)
@@ -430,51 +444,58 @@ ProDocuX v1.0.0
     except Exception as e:
         print(f"⚠️  創建說明檔案失敗: {e}")
 
-def main():
-    """主函數"""
-    show_welcome()
-    
-    # 獲取工作空間路徑
-    workspace_path = get_workspace_path()
-    
-    # 獲取AI提供者選擇
-    provider = get_ai_provider()
-    
-    # 獲取API金鑰
-    api_key = get_api_keys(provider)
-    
-    # 根據提供者選擇預設模型（選擇最新且平衡的版本）
-    default_models = {
-        'openai': 'gpt-4o',                    # 最新版本，性能好且相對便宜
-        'claude': 'claude-3-5-sonnet-20241022', # 最新版本，文檔處理能力強
-        'gemini': 'gemini-2.5-pro',            # 最新版本，免費額度大
-        'grok': 'grok-2',                      # 最新版本
-        'microsoft': 'copilot-gpt-4-turbo'     # Turbo版本，性價比更好
-    }
-    model = default_models.get(provider, 'gpt-4')
-    
-    ai_config = {
-        'provider': provider,
-        'model': model,
-        'api_key': api_key
-    }
-    
-    # 獲取快捷方式選擇
-    selected_shortcuts = get_shortcut_selection()
-    
-    # 顯示設定摘要
-    show_workspace_info(workspace_path, selected_shortcuts, ai_config)
-    
-    # 確認設定
+def confirm_setup():
+    """確認設定，回傳是否確認"""
     while True:
         choice = input("確認以上設定？(y/n): ").lower().strip()
         if choice in ['y', 'yes', '是', '']:
-            break
+            return True
         elif choice in ['n', 'no', '否']:
-            print("重新設定...")
-            return main()
+            return False
         else:
             print("❌ 請輸入 y 或 n")
+
+def main():
+    """主函數"""
+    show_welcome()
+    
+    # 收集設定，使用者不確認時重新收集（以迴圈取代遞迴呼叫 main）
+    while True:
+        # 獲取工作空間路徑
+        workspace_path = get_workspace_path()
+        
+        # 獲取AI提供者選擇
+        provider = get_ai_provider()
+        
+        # 獲取API金鑰
+        api_key = get_api_keys(provider)
+        
+        # 根據提供者選擇預設模型（選擇最新且平衡的版本）
+        default_models = {
+            'openai': 'gpt-4o',                    # 最新版本，性能好且相對便宜
+            'claude': 'claude-3-5-sonnet-20241022', # 最新版本，文檔處理能力強
+            'gemini': 'gemini-2.5-pro',            # 最新版本，免費額度大
+            'grok': 'grok-2',                      # 最新版本
+            'microsoft': 'copilot-gpt-4-turbo'     # Turbo版本，性價比更好
+        }
+        model = default_models.get(provider, 'gpt-4')
+        
+        ai_config = {
+            'provider': provider,
+            'model': model,
+            'api_key': api_key
+        }
+        
+        # 獲取快捷方式選擇
+        selected_shortcuts = get_shortcut_selection()
+        
+        # 顯示設定摘要
+        show_workspace_info(workspace_path, selected_shortcuts, ai_config)
+        
+        # 確認設定
+        if confirm_setup():
+            break
+        print("重新設定...")
     
     # 保存設定
     if save_setup(workspace_path, selected_shortcuts, ai_config):
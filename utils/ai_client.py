@@ -7,19 +7,227 @@ AI客戶端
 
 import os
 import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple
 from dotenv import load_dotenv
 
+from .tokens import count_tokens
+from .schemas import GENERAL_ANALYSIS_SCHEMA, STRUCTURE_ANALYSIS_SCHEMA
+from . import semantic_cache
+
+# diskcache 為可選套件，未安裝時回應快取只保留在記憶體
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
 # 載入環境變數（將在初始化時從正確的位置載入）
 
 logger = logging.getLogger(__name__)
 
-JSON_ENFORCE_PREFIX = (
-    "你必須嚴格輸出純 JSON。不要輸出任何解說、標點、程式碼區塊標記、前後綴文字。"
-    "若無法找到欄位，請以空字串或空陣列填入。回傳物件的最外層必須是 JSON 物件。"
+JSON_ENFORCE_PREFIX = "只輸出一個 JSON 物件，不要任何說明文字或程式碼區塊標記；找不到的欄位填空字串或空陣列。"
+
+# 支援 response_format={"type": "json_object"} 的 OpenAI 模型（前綴比對；gpt-4 本身不支援）
+_JSON_MODE_MODEL_PREFIXES = (
+    "gpt-4o", "gpt-4.1", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125",
+    "gpt-3.5-turbo-1106", "gpt-3.5-turbo-0125"
 )
 
+# 文檔分析提示詞：(任務說明, 輸出格式)，兩者皆為固定文字，文檔內容於組裝時插入
+_ANALYSIS_PROMPTS = {
+    "general": ("請分析以下文檔內容，提取關鍵資訊。", f"輸出格式：{GENERAL_ANALYSIS_SCHEMA}"),
+    "structure": ("請分析以下文檔的結構。", f"輸出格式：{STRUCTURE_ANALYSIS_SCHEMA}"),
+    "extraction": ("請從以下文檔中提取結構化資料。", "以標準格式的 JSON 輸出。")
+}
+
+@lru_cache(maxsize=None)
+def _openai_client(api_key: str):
+    """同一API金鑰在程序內共用一個 OpenAI 客戶端（可重複使用連線池，客戶端為執行緒安全）"""
+    import openai
+    return openai.OpenAI(api_key=api_key)
+
+def _retryable_errors() -> tuple:
+    """可重試的API錯誤：速率限制、連線/逾時與伺服器端錯誤"""
+    import openai
+    return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """判斷是否為 API 速率/token限制錯誤（429）"""
+    error_msg = str(error)
+    return "429" in error_msg or "rate_limit" in error_msg.lower()
+
+def _find_json_span(text: str, start: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    自 start 起找出第一段括號平衡的 {...} 範圍（忽略字串內的括號）
+    
+    未閉合的 { 會被略過，自其下一個字元繼續尋找，避免說明文字中的單一括號中斷抽取。
+    
+    Returns:
+        (起始位置, 結束位置)，找不到完整的物件時回傳 None
+    """
+    begin = text.find('{', start)
+    while begin != -1:
+        span = _balanced_span_at(text, begin)
+        if span is not None:
+            return span
+        begin = text.find('{', begin + 1)
+    return None
+
+def _balanced_span_at(text: str, begin: int) -> Optional[Tuple[int, int]]:
+    """自 begin 處的 { 起掃描至對應的 }，未閉合時回傳 None"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(begin, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return begin, i + 1
+    return None
+
+def _iter_json_objects(text: str):
+    """依序產生回覆中可成功解析的 JSON 物件片段 (片段字串, 解析結果)"""
+    start = 0
+    while True:
+        span = _find_json_span(text, start)
+        if span is None:
+            return
+        snippet = text[span[0]:span[1]]
+        try:
+            yield snippet, json.loads(snippet)
+        except ValueError:
+            pass
+        start = span[1]
+
+class _ResponseCache:
+    """AI回應快取：記憶體 LRU，安裝 diskcache 時另存於磁碟（跨程序保留）"""
+    
+    def __init__(self, directory: Optional[str], ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        if diskcache is not None and directory:
+            try:
+                self._disk = diskcache.Cache(directory)
+            except Exception as e:
+                logger.warning(f"無法開啟磁碟回應快取，僅使用記憶體快取: {e}")
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+        if self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                self._remember(key, value, now)
+            return value
+        return None
+    
+    def set(self, key: str, value: str):
+        self._remember(key, value, time.time())
+        if self._disk is not None:
+            self._disk.set(key, value, expire=self.ttl_seconds)
+    
+    def _remember(self, key: str, value: str, now: float):
+        with self._lock:
+            self._memory[key] = (now + self.ttl_seconds, value)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+@lru_cache(maxsize=None)
+def _get_response_cache(directory: Optional[str], ttl_seconds: float) -> _ResponseCache:
+    """同一快取目錄在程序內共用一個快取實例"""
+    return _ResponseCache(directory, ttl_seconds)
+
+@lru_cache(maxsize=None)
+def _get_semantic_cache(directory: str, threshold: float, model_name: str, max_entries: int,
+                        ttl_seconds: float) -> Optional["semantic_cache.SemanticCache"]:
+    """同一設定在程序內共用一個語意快取（載入句向量模型成本高）；無法使用時回傳 None"""
+    try:
+        return semantic_cache.SemanticCache(directory, threshold, model_name, max_entries, ttl_seconds)
+    except Exception as e:
+        logger.warning(f"語意回應快取無法啟用: {e}")
+        return None
+
+class _CacheKey(NamedTuple):
+    """回應快取鍵：digest 供精確比對，namespace/prompt 供語意比對"""
+    digest: str
+    namespace: str
+    prompt: str
+
+class _RateLimiter:
+    """每分鐘請求數/token數的令牌桶，供非同步批次請求節流使用"""
+    
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # 起始時桶為滿，允許立即送出第一批請求
+        self._available_requests = float(requests_per_minute or 0)
+        self._available_tokens = float(tokens_per_minute or 0)
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        if self.requests_per_minute:
+            self._available_requests = min(
+                self.requests_per_minute,
+                self._available_requests + elapsed * self.requests_per_minute / 60.0
+            )
+        if self.tokens_per_minute:
+            self._available_tokens = min(
+                self.tokens_per_minute,
+                self._available_tokens + elapsed * self.tokens_per_minute / 60.0
+            )
+    
+    async def acquire(self, tokens: int):
+        """等待直到額度足夠送出一次請求（消耗 1 個請求與 tokens 個token）"""
+        if self.tokens_per_minute:
+            # 單次請求超過每分鐘上限時，最多等待整桶補滿
+            tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                requests_ok = not self.requests_per_minute or self._available_requests >= 1
+                tokens_ok = not self.tokens_per_minute or self._available_tokens >= tokens
+                if requests_ok and tokens_ok:
+                    if self.requests_per_minute:
+                        self._available_requests -= 1
+                    if self.tokens_per_minute:
+                        self._available_tokens -= tokens
+                    return
+                await asyncio.sleep(0.05)
+
 class AIClient:
     """AI客戶端"""
     
@@ -33,15 +241,42 @@ class AIClient:
         self.model = model
         self.api_key = self._get_api_key()
         self.client = self._initialize_client()
+        # 非同步客戶端僅在批次請求時才建立（綁定建立時的事件迴圈）
+        self._async_client = None
+        self._async_client_loop = None
         # 讀取設定（保守預設）
         try:
             from .settings_manager import SettingsManager
         except Exception:
             from utils.settings_manager import SettingsManager  # type: ignore
-        api_cfg = SettingsManager().get_api_config()
-        self.force_json = bool(api_cfg.get("force_json", False))
+        settings_manager = SettingsManager()
+        api_cfg = settings_manager.get_api_config()
+        # force_json 未設定（None）時依模型自動判斷：支援 JSON 模式的模型一律強制輸出 JSON
+        force_json = api_cfg.get("force_json")
+        self.force_json = model.startswith(_JSON_MODE_MODEL_PREFIXES) if force_json is None else bool(force_json)
         self.max_tokens_cap = int(api_cfg.get("max_tokens_cap", 4000))
         self.retry_cfg = api_cfg.get("retry", {"enabled": False, "max_attempts": 1, "backoff_seconds": 0})
+        # 固定的提示詞放在前面、文檔內容放在最後，讓 API 的提示詞前綴快取生效
+        self.cache_prefix = bool(api_cfg.get("cache_prefix", True))
+        # 回應快取：相同模型、參數與提示詞的請求直接回傳先前的結果
+        cache_cfg = api_cfg.get("response_cache", {"enabled": True, "ttl_seconds": 604800})
+        self.response_cache = None
+        if cache_cfg.get("enabled", True):
+            cache_dir = Path(settings_manager.workspace_dirs["cache"]) / "llm"
+            self.response_cache = _get_response_cache(
+                str(cache_dir), float(cache_cfg.get("ttl_seconds", 604800))
+            )
+        # 語意快取（可選）：提示詞與先前請求高度相似時重複使用回應，需安裝 sentence-transformers
+        semantic_cfg = api_cfg.get("semantic_cache", {"enabled": False})
+        self.semantic_cache = None
+        if semantic_cfg.get("enabled", False):
+            self.semantic_cache = _get_semantic_cache(
+                str(Path(settings_manager.workspace_dirs["cache"]) / "llm"),
+                float(semantic_cfg.get("threshold", 0.95)),
+                semantic_cfg.get("model", semantic_cache.DEFAULT_EMBEDDING_MODEL),
+                int(semantic_cfg.get("max_entries", 5000)),
+                float(semantic_cfg.get("ttl_seconds", 604800))
+            )
         
         logger.info(f"AI客戶端已初始化，模型: {model}")
     
@@ -55,8 +290,7 @@ class AIClient:
     def _initialize_client(self):
         """初始化AI客戶端"""
         try:
-            import openai
-            return openai.OpenAI(api_key=self.api_key)
+            return _openai_client(self.api_key)
         except ImportError:
             logger.error("OpenAI套件未安裝，請執行: pip install openai")
             raise
@@ -64,101 +298,252 @@ class AIClient:
             logger.error(f"AI客戶端初始化失敗: {e}")
             raise
 
-    def _ensure_json(self, text: str) -> str:
-        """嘗試從回覆中抽取並修復為合法 JSON 物件字串。"""
+    def _get_async_client(self):
+        """獲取（延遲建立）非同步AI客戶端；其連線屬於事件迴圈，換了迴圈（如再次 asyncio.run）就重新建立"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            import openai
+            self._async_client = openai.AsyncOpenAI(api_key=self.api_key)
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _retry_options(self) -> Dict[str, Any]:
+        """
+        依重試設定建立 tenacity 重試參數
+        
+        未啟用重試時只嘗試一次；啟用時以帶隨機抖動的指數退避重試，
+        backoff_seconds 為退避基準（至少1秒），單次等待最長60秒。
+        tenacity 於實際送出請求時才匯入，匯入 utils 套件不需要安裝 tenacity。
+        """
+        from tenacity import retry_if_exception_type, stop_after_attempt, wait_random_exponential
+        
+        attempts = int(self.retry_cfg.get("max_attempts", 1)) if self.retry_cfg.get("enabled") else 1
+        backoff = float(self.retry_cfg.get("backoff_seconds", 0)) or 1.0
+        return {
+            "stop": stop_after_attempt(max(1, attempts)),
+            "wait": wait_random_exponential(multiplier=backoff, max=60),
+            "retry": retry_if_exception_type(_retryable_errors()),
+            "reraise": True
+        }
+    
+    def _completion_request(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+        """構建資料提取請求參數"""
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": JSON_ENFORCE_PREFIX},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.1,
+            "max_tokens": max_tokens
+        }
+        if self.force_json:
+            request["response_format"] = {"type": "json_object"}
+        return request
+    
+    def _call_once(self, request: Dict[str, Any]):
+        """送出單次請求（由 tenacity 負責重試）"""
+        return self.client.chat.completions.create(**request)
+    
+    def _cache_key(self, system: str, prompt: str, temperature: float, max_tokens: int) -> _CacheKey:
+        """以模型、請求參數與提示詞計算回應快取鍵"""
+        params = f"{self.model}|{temperature}|{max_tokens}|{self.force_json}|{system}"
+        return _CacheKey(
+            digest=hashlib.sha256(f"{params}|{prompt}".encode("utf-8")).hexdigest(),
+            # 語意快取只在相同請求參數的提示詞之間比對
+            namespace=hashlib.sha256(params.encode("utf-8")).hexdigest()[:16],
+            prompt=prompt
+        )
+    
+    def _cache_get(self, key: _CacheKey) -> Optional[str]:
+        if self.response_cache is not None:
+            cached = self.response_cache.get(key.digest)
+            if cached is not None:
+                logger.info("命中AI回應快取，略過API請求")
+                return cached
+        if self.semantic_cache is not None:
+            return self.semantic_cache.get(key.namespace, key.prompt)
+        return None
+    
+    def _cache_set(self, key: _CacheKey, value: str):
+        if self.response_cache is not None:
+            self.response_cache.set(key.digest, value)
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(key.namespace, key.prompt, value)
+
+    def _extract_json(self, text: str, json_mode: bool = False) -> Optional[str]:
+        """
+        嘗試從回覆中抽取並修復為合法 JSON 物件字串，無法解析時回傳 None。
+        
+        json_mode 為 True（請求已指定 JSON 模式）時回覆本應是合法 JSON，
+        驗證通過即原樣回傳；仍保留後續的抽取流程作為防護。
+        """
+        if json_mode:
+            try:
+                json.loads(text)
+                return text
+            except ValueError:
+                logger.warning("JSON 模式的回覆無法直接解析，嘗試抽取 JSON 片段")
         try:
             # 先嘗試直接 parse
             return json.dumps(json.loads(text), ensure_ascii=False)
         except Exception:
             pass
-        # 抽取第一段看似 JSON 的片段
-        try:
-            import re
-            m = re.search(r"\{[\s\S]*\}", text)
-            if m:
-                snippet = m.group(0)
-                json.loads(snippet)  # 驗證
-                return snippet
-        except Exception:
-            pass
-        # 最後回退：包一層模型修復（可選：這裡直接回原文）
-        logger.warning("無法嚴格解析為 JSON，回傳原始文本供上游容錯")
-        return text
+        # 抽取第一段可解析的 JSON 物件片段
+        for snippet, _ in _iter_json_objects(text):
+            return snippet
+        return None
+    
+    def _ensure_json(self, text: str, json_mode: bool = False) -> str:
+        """嘗試從回覆中抽取並修復為合法 JSON 物件字串，無法解析時回傳原始文本供上游容錯"""
+        result = self._extract_json(text, json_mode)
+        if result is None:
+            logger.warning("無法嚴格解析為 JSON，回傳原始文本供上游容錯")
+            return text
+        return result
     
-    def extract_data(self, prompt: str, max_tokens: int = 2000) -> str:
+    def _finish_extraction(self, text: str, cache_key: _CacheKey) -> str:
+        """整理回覆為 JSON 字串；只快取成功解析的結果，無法解析的原始文本不寫入快取"""
+        result = self._extract_json(text, json_mode=self.force_json)
+        if result is None:
+            logger.warning("無法嚴格解析為 JSON，回傳原始文本供上游容錯（不寫入回應快取）")
+            return text
+        self._cache_set(cache_key, result)
+        return result
+    
+    def extract_data(self, prompt: str, max_tokens: int = 2000, force_refresh: bool = False) -> str:
         """
         提取結構化資料
         
         Args:
             prompt: 提示詞
             max_tokens: 最大token數
+            force_refresh: 忽略回應快取，強制重新請求
             
         Returns:
             AI回應（盡可能為 JSON 字串）
         """
-        try:
-            messages = [
-                {"role": "system", "content": JSON_ENFORCE_PREFIX},
-                {"role": "user", "content": prompt}
-            ]
-
-            # 根據設定決定是否強制 JSON、是否重試
-            response = None
-            attempt = 0
-            max_tokens = min(max_tokens, self.max_tokens_cap)
-            while True:
-                attempt += 1
-                try:
-                    if self.force_json:
-                        response = self.client.chat.completions.create(
-                            model=self.model,
-                            messages=messages,
-                            temperature=0.1,
-                            max_tokens=max_tokens,
-                            response_format={"type": "json_object"}
-                        )
-                    else:
-                        response = self.client.chat.completions.create(
-                            model=self.model,
-                            messages=messages,
-                            temperature=0.1,
-                            max_tokens=max_tokens
-                        )
-                    break
-                except Exception as err:
-                    if not self.retry_cfg.get("enabled") or attempt >= int(self.retry_cfg.get("max_attempts", 1)):
-                        raise err
-                    import time
-                    time.sleep(float(self.retry_cfg.get("backoff_seconds", 0)))
-            text = response.choices[0].message.content.strip()
-            return self._ensure_json(text)
-            
-        except Exception as e:
-            error_msg = str(e)
-            if "429" in error_msg or "rate_limit" in error_msg.lower():
+        max_tokens = min(max_tokens, self.max_tokens_cap)
+        cache_key = self._cache_key(JSON_ENFORCE_PREFIX, prompt, 0.1, max_tokens)
+        if not force_refresh:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+        
+        from tenacity import Retrying
+        
+        while True:
+            try:
+                # 根據設定決定是否強制 JSON、是否重試
+                response = Retrying(**self._retry_options())(
+                    self._call_once, self._completion_request(prompt, max_tokens)
+                )
+                break
+            except Exception as e:
+                if not _is_rate_limit_error(e):
+                    logger.error(f"AI資料提取失敗: {e}")
+                    raise
                 logger.warning(f"API限制錯誤，嘗試減少token使用: {e}")
                 # 嘗試減少max_tokens
                 if max_tokens > 1000:
                     logger.info("嘗試使用較少的max_tokens重新請求")
-                    return self.extract_data(prompt, max_tokens // 2)
-                else:
-                    logger.error("即使減少token也無法處理，檔案可能太大")
-                    # 提供更具體的建議
-                    suggestions = [
-                        "1. 請先使用頁面預覽功能選擇要處理的特定頁面",
-                        "2. 將分頁模式改為 'auto' 或 'all' 以自動選擇頁面",
-                        "3. 嘗試處理較小的檔案",
-                        "4. 檢查是否選擇了正確的AI模型（某些模型有較高的token限制）"
-                    ]
-                    suggestion_text = "\n".join(suggestions)
-                    raise Exception(f"檔案太大，無法處理。\n\n建議解決方案：\n{suggestion_text}\n\n原始錯誤: {e}")
-            else:
-                logger.error(f"AI資料提取失敗: {e}")
-                raise
+                    max_tokens //= 2
+                    continue
+                logger.error("即使減少token也無法處理，檔案可能太大")
+                # 提供更具體的建議
+                suggestions = [
+                    "1. 請先使用頁面預覽功能選擇要處理的特定頁面",
+                    "2. 將分頁模式改為 'auto' 或 'all' 以自動選擇頁面",
+                    "3. 嘗試處理較小的檔案",
+                    "4. 檢查是否選擇了正確的AI模型（某些模型有較高的token限制）"
+                ]
+                suggestion_text = "\n".join(suggestions)
+                raise Exception(f"檔案太大，無法處理。\n\n建議解決方案：\n{suggestion_text}\n\n原始錯誤: {e}")
+        
+        return self._finish_extraction(response.choices[0].message.content.strip(), cache_key)
+
+    async def aextract_data(self, prompt: str, max_tokens: int = 2000, force_refresh: bool = False) -> str:
+        """
+        非同步提取結構化資料（與 extract_data 使用相同的設定、重試規則與回應快取）
+        
+        Args:
+            prompt: 提示詞
+            max_tokens: 最大token數
+            force_refresh: 忽略回應快取，強制重新請求
+            
+        Returns:
+            AI回應（盡可能為 JSON 字串）
+        """
+        cache_key = self._cache_key(JSON_ENFORCE_PREFIX, prompt, 0.1, min(max_tokens, self.max_tokens_cap))
+        if not force_refresh:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+        
+        from tenacity import AsyncRetrying
+        
+        client = self._get_async_client()
+        request = self._completion_request(prompt, min(max_tokens, self.max_tokens_cap))
+        try:
+            async for attempt in AsyncRetrying(**self._retry_options()):
+                with attempt:
+                    response = await client.chat.completions.create(**request)
+        except Exception as err:
+            logger.error(f"AI資料提取失敗: {err}")
+            raise
+        return self._finish_extraction(response.choices[0].message.content.strip(), cache_key)
+    
+    async def aextract_batch(self, prompts: List[str], max_tokens: int = 2000,
+                             max_concurrency: int = 10,
+                             max_requests_per_minute: Optional[int] = None,
+                             max_tokens_per_minute: Optional[int] = None) -> List[str]:
+        """
+        非同步並行提取多份提示詞的結構化資料
+        
+        以 Semaphore 限制同時進行的請求數，並以每分鐘請求數/token數節流，
+        避免並行請求觸發 API 速率限制。
+        
+        Args:
+            prompts: 提示詞列表
+            max_tokens: 每次請求的最大token數
+            max_concurrency: 最大並行請求數
+            max_requests_per_minute: 每分鐘最大請求數（None 表示不限制）
+            max_tokens_per_minute: 每分鐘最大token數（None 表示不限制）
+            
+        Returns:
+            與 prompts 順序一致的AI回應列表
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        limiter = _RateLimiter(max_requests_per_minute, max_tokens_per_minute)
+        completion_tokens = min(max_tokens, self.max_tokens_cap)
+        
+        async def run(prompt: str) -> str:
+            async with semaphore:
+                # 依提示詞與回應上限預估本次請求消耗的token
+                await limiter.acquire(self.estimate_tokens(prompt) + completion_tokens)
+                return await self.aextract_data(prompt, max_tokens)
+        
+        return list(await asyncio.gather(*(run(prompt) for prompt in prompts)))
+    
+    def extract_batch(self, prompts: List[str], max_tokens: int = 2000,
+                      max_concurrency: int = 10,
+                      max_requests_per_minute: Optional[int] = None,
+                      max_tokens_per_minute: Optional[int] = None) -> List[str]:
+        """
+        並行提取多份提示詞的結構化資料（同步介面，供非 async 呼叫端使用）
+        
+        參數與回傳值同 aextract_batch。
+        """
+        if not prompts:
+            return []
+        return asyncio.run(self.aextract_batch(
+            prompts, max_tokens, max_concurrency,
+            max_requests_per_minute, max_tokens_per_minute
+        ))
 
     def generate_content(self, prompt: str, max_tokens: int = 2000) -> str:
         """
-        生成內容
+        生成內容（temperature 0.7 的取樣結果不寫入回應快取）
         
         Args:
             prompt: 提示詞
@@ -209,65 +594,20 @@ class AIClient:
     
     def _build_analysis_prompt(self, content: str, analysis_type: str) -> str:
         """構建分析提示詞"""
-        prompts = {
-            "general": f"""
-請分析以下文檔內容，提取關鍵資訊：
-
-文檔內容：
-{content}
-
-請以JSON格式輸出分析結果：
-{{
-  "文檔類型": "文檔類型",
-  "主要內容": "內容摘要",
-  "關鍵資訊": ["關鍵資訊1", "關鍵資訊2"],
-  "建議": "處理建議"
-}}
-""",
-            "structure": f"""
-請分析以下文檔的結構：
-
-文檔內容：
-{content}
-
-請以JSON格式輸出結構分析：
-{{
-  "標題": "文檔標題",
-  "章節": [
-    {{"名稱": "章節名稱", "內容": "章節摘要"}}
-  ],
-  "表格": [
-    {{"標題": "表格標題", "列數": 0, "欄數": 0}}
-  ]
-}}
-""",
-            "extraction": f"""
-請從以下文檔中提取結構化資料：
-
-文檔內容：
-{content}
-
-請按照標準格式提取資料，以JSON格式輸出。
-"""
-        }
+        instruction, output_format = _ANALYSIS_PROMPTS.get(analysis_type, _ANALYSIS_PROMPTS["general"])
         
-        return prompts.get(analysis_type, prompts["general"])
+        if self.cache_prefix:
+            # 系統提示詞與任務說明、輸出格式組成每次相同的前綴，可命中 OpenAI 的自動前綴快取
+            return f"{instruction}\n\n{output_format}\n\n文檔內容：\n{content}\n"
+        return f"\n{instruction}\n\n文檔內容：\n{content}\n\n{output_format}\n"
     
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """解析JSON回應"""
-        try:
-            import re
-            # 提取JSON部分
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                return json.loads(json_str)
-            else:
-                logger.error("無法從AI回應中提取JSON")
-                return {}
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON解析失敗: {e}")
-            return {}
+        # 提取第一段可解析的JSON部分
+        for _, data in _iter_json_objects(response):
+            return data
+        logger.error("無法從AI回應中提取JSON")
+        return {}
     
     def estimate_tokens(self, text: str) -> int:
         """
@@ -279,6 +619,9 @@ class AIClient:
         Returns:
             估算的token數量
         """
+        tokens = count_tokens(text, self.model)
+        if tokens is not None:
+            return tokens
         # 簡單的token估算：約4個字符 = 1個token
         return len(text) // 4
     
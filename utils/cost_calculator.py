@@ -6,14 +6,44 @@
 """
 
 import os
+import re
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 import pdfplumber
 from docx import Document
 
+from .tokens import count_tokens
+
+# pypdfium2（PDFium C實作）為可選套件，只需純文字時比 pdfplumber 快得多；
+# 設定 PRODOCUX_PDF_ENGINE=pdfplumber 可強制使用 pdfplumber
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+PDF_TEXT_ENGINE = os.environ.get('PRODOCUX_PDF_ENGINE', 'pdfium')
+
+# PDFium 本身不是執行緒安全的（即使是不同文件），批次估算會在多個執行緒讀取PDF，所有 pdfium 呼叫皆需持有此鎖
+_PDFIUM_LOCK = threading.RLock()
+
+# WordprocessingML 段落與文字節點標籤
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W_P = f'{{{_W_NS}}}p'
+_W_T = f'{{{_W_NS}}}t'
+
 logger = logging.getLogger(__name__)
 
+# 連續的中文字（CJK統一表意文字 U+4E00–U+9FFF）
+_CJK_RUN_RE = re.compile(r'[\u4e00-\u9fff]+')
+
+def _count_chinese_chars(text: str) -> int:
+    """計算中文字數量（以正則在C層級找出連續中文字段再加總長度，不逐字走Python迴圈）"""
+    return sum(map(len, _CJK_RUN_RE.findall(text)))
+
 class CostCalculator:
     """成本計算器"""
     
@@ -34,6 +64,14 @@ class CostCalculator:
         # 預設模型
         self.default_model = 'gpt-4'
         
+        # 預設模型的每token單價 (模型, 輸入, 輸出)，切換 default_model 時自動重算
+        self._unit_prices = self._compute_unit_prices()
+        
+        # 文檔統計快取：(路徑, 修改時間, 大小) -> 字數/token統計，檔案變更後自動失效
+        self._doc_cache: "OrderedDict[tuple, Tuple[int, int, Optional[int]]]" = OrderedDict()
+        self._doc_cache_size = 64
+        self._doc_cache_lock = threading.Lock()
+        
         logger.info("成本計算器已初始化")
     
     def estimate_cost(self, file_path: Path, profile_name: str = "default") -> Dict[str, Any]:
@@ -48,13 +86,13 @@ class CostCalculator:
             成本估算資訊
         """
         try:
-            # 讀取文檔內容
-            content = self._read_document(file_path)
-            if not content:
+            # 統計文檔字數（PDF逐頁累計，不保留全文）
+            total_chars, chinese_chars, content_tokens = self._document_stats(file_path)
+            if not total_chars:
                 return self._create_error_response("無法讀取文檔內容")
             
             # 估算token數量
-            estimated_tokens = self._estimate_tokens(content)
+            estimated_tokens = self._estimate_tokens_from_stats(total_chars, chinese_chars, content_tokens)
             
             # 計算成本
             cost_info = self._calculate_cost(estimated_tokens)
@@ -64,7 +102,7 @@ class CostCalculator:
             
             return {
                 'success': True,
-                'file_size': len(content),
+                'file_size': total_chars,
                 'estimated_tokens': estimated_tokens,
                 'estimated_cost': cost_info['total_cost'],
                 'input_cost': cost_info['input_cost'],
@@ -78,6 +116,74 @@ class CostCalculator:
             logger.error(f"成本估算失敗: {e}")
             return self._create_error_response(str(e))
     
+    def _document_stats(self, file_path: Path) -> Tuple[int, int, Optional[int]]:
+        """
+        統計文檔的總字數、中文字數與token數（同一檔案未變更時直接使用快取結果）
+        
+        Returns:
+            (總字數, 中文字數, token數)，總字數與讀取全文後的長度相同；
+            tiktoken 不可用時token數為 None
+        """
+        stat = file_path.stat()
+        key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        with self._doc_cache_lock:
+            stats = self._doc_cache.get(key)
+            if stats is not None:
+                self._doc_cache.move_to_end(key)
+                return stats
+        
+        stats = self._read_document_stats(file_path)
+        # 讀取失敗（無內容）時不快取，下次重新嘗試
+        if stats[0]:
+            with self._doc_cache_lock:
+                self._doc_cache[key] = stats
+                if len(self._doc_cache) > self._doc_cache_size:
+                    self._doc_cache.popitem(last=False)
+        return stats
+    
+    def _read_document_stats(self, file_path: Path) -> Tuple[int, int, Optional[int]]:
+        """讀取文檔並統計字數與token數（PDF/Word逐頁、逐段統計，不組合全文）"""
+        file_type = file_path.suffix.lower()
+        
+        if file_type == '.pdf':
+            try:
+                return self._text_stats(self._iter_pdf_pages(file_path))
+            except Exception as e:
+                logger.error(f"PDF讀取失敗: {e}")
+                return 0, 0, None
+        elif file_type in ['.docx', '.doc']:
+            try:
+                return self._text_stats(self._iter_word_paragraphs(file_path))
+            except Exception as e:
+                logger.error(f"Word讀取失敗: {e}")
+                return 0, 0, None
+        
+        content = self._read_document(file_path)
+        return len(content), _count_chinese_chars(content), count_tokens(content, self.default_model)
+    
+    def _text_stats(self, parts: Iterable[str]) -> Tuple[int, int, Optional[int]]:
+        """
+        逐段統計文字的字數與token數，每段用完即丟棄，記憶體用量與文檔大小無關
+        
+        Returns:
+            (總字數, 中文字數, token數)，總字數等同以換行串接各段後的長度
+        """
+        total_chars = 0
+        chinese_chars = 0
+        content_tokens = 0
+        part_count = 0
+        for part in parts:
+            total_chars += len(part)
+            chinese_chars += _count_chinese_chars(part)
+            if content_tokens is not None:
+                part_tokens = count_tokens(part, self.default_model)
+                content_tokens = None if part_tokens is None else content_tokens + part_tokens
+            part_count += 1
+        # 計入各段之間的換行字元
+        if part_count:
+            total_chars += part_count - 1
+        return total_chars, chinese_chars, content_tokens
+    
     def _read_document(self, file_path: Path) -> str:
         """讀取文檔內容"""
         file_type = file_path.suffix.lower()
@@ -91,16 +197,57 @@ class CostCalculator:
         else:
             raise ValueError(f"不支援的檔案格式: {file_type}")
     
+    def _iter_pdf_pages(self, file_path: Path) -> Iterator[str]:
+        """逐頁產生PDF文字（略過無文字的頁面）"""
+        if pdfium is not None and PDF_TEXT_ENGINE != 'pdfplumber':
+            yield from self._iter_pdf_pages_pdfium(file_path)
+            return
+        
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    yield page_text
+                # 釋放該頁的解析快取
+                if hasattr(page, 'flush_cache'):
+                    page.flush_cache()
+    
+    def _iter_pdf_pages_pdfium(self, file_path: Path) -> Iterator[str]:
+        """以 pypdfium2 逐頁產生PDF文字（逐頁持有 _PDFIUM_LOCK，不在持有鎖時 yield）"""
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(str(file_path))
+            page_count = len(pdf)
+        try:
+            for index in range(page_count):
+                with _PDFIUM_LOCK:
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    try:
+                        page_text = textpage.get_text_range()
+                    finally:
+                        textpage.close()
+                        page.close()
+                # PDFium 以 \r\n 分行，統一為 \n 與 pdfplumber 一致
+                page_text = page_text.replace('\r\n', '\n')
+                if page_text:
+                    yield page_text
+        finally:
+            with _PDFIUM_LOCK:
+                pdf.close()
+    
+    def _iter_word_paragraphs(self, file_path: Path) -> Iterator[str]:
+        """逐段產生Word文字（略過空白段落）"""
+        doc = Document(file_path)
+        # 直接走訪 XML（lxml 於C層級收集各段 w:t 文字），不為每個段落建立 python-docx 物件
+        for paragraph in doc.element.body.iterchildren(_W_P):
+            text = ''.join(paragraph.itertext(_W_T, with_tail=False))
+            if text.strip():
+                yield text
+    
     def _read_pdf(self, file_path: Path) -> str:
         """讀取PDF檔案"""
         try:
-            with pdfplumber.open(file_path) as pdf:
-                text_parts = []
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(page_text)
-                return '\n'.join(text_parts)
+            return '\n'.join(self._iter_pdf_pages(file_path))
         except Exception as e:
             logger.error(f"PDF讀取失敗: {e}")
             return ""
@@ -108,12 +255,7 @@ class CostCalculator:
     def _read_word(self, file_path: Path) -> str:
         """讀取Word檔案"""
         try:
-            doc = Document(file_path)
-            text_parts = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_parts.append(paragraph.text)
-            return '\n'.join(text_parts)
+            return '\n'.join(self._iter_word_paragraphs(file_path))
         except Exception as e:
             logger.error(f"Word讀取失敗: {e}")
             return ""
@@ -137,18 +279,31 @@ class CostCalculator:
         Returns:
             估算的token數量
         """
-        # 簡單的token估算：約4個字符 = 1個token
-        # 實際的token計算會更複雜，這裡使用簡化版本
-        
-        # 基本token估算
-        basic_tokens = len(content) // 4
-        
-        # 考慮中文和英文的差異
-        chinese_chars = sum(1 for char in content if '\u4e00' <= char <= '\u9fff')
-        english_chars = len(content) - chinese_chars
+        return self._estimate_tokens_from_stats(
+            len(content), _count_chinese_chars(content), count_tokens(content, self.default_model)
+        )
+    
+    def _estimate_tokens_from_stats(self, total_chars: int, chinese_chars: int,
+                                    content_tokens: Optional[int] = None) -> int:
+        """
+        依字數統計估算token數量
         
-        # 中文通常需要更多tokens
-        estimated_tokens = int(english_chars / 4 + chinese_chars / 2)
+        Args:
+            total_chars: 總字數
+            chinese_chars: 中文字數
+            content_tokens: 以 tiktoken 計算的文檔token數（None 表示以字數估算）
+            
+        Returns:
+            估算的token數量
+        """
+        if content_tokens is not None:
+            # 文檔內容的實際token數
+            estimated_tokens = content_tokens
+        else:
+            # 簡單的token估算：約4個字符 = 1個token
+            # 考慮中文和英文的差異，中文通常需要更多tokens
+            english_chars = total_chars - chinese_chars
+            estimated_tokens = int(english_chars / 4 + chinese_chars / 2)
         
         # 加上提示詞的token消耗（約1000-2000 tokens）
         prompt_tokens = 1500
@@ -170,14 +325,17 @@ class CostCalculator:
         Returns:
             成本資訊
         """
-        model_pricing = self.pricing[self.default_model]
+        model, input_price, output_price = self._unit_prices
+        if model != self.default_model:
+            self._unit_prices = self._compute_unit_prices()
+            model, input_price, output_price = self._unit_prices
         
         # 假設輸入和輸出各佔一半
         input_tokens = int(tokens * 0.7)  # 70% 輸入
         output_tokens = int(tokens * 0.3)  # 30% 輸出
         
-        input_cost = (input_tokens / 1000) * model_pricing['input']
-        output_cost = (output_tokens / 1000) * model_pricing['output']
+        input_cost = input_tokens * input_price
+        output_cost = output_tokens * output_price
         total_cost = input_cost + output_cost
         
         return {
@@ -188,6 +346,11 @@ class CostCalculator:
             'total_cost': total_cost
         }
     
+    def _compute_unit_prices(self) -> Tuple[str, float, float]:
+        """將預設模型的每1K tokens定價換算為每token單價"""
+        model_pricing = self.pricing[self.default_model]
+        return self.default_model, model_pricing['input'] / 1000, model_pricing['output'] / 1000
+    
     def _estimate_processing_time(self, tokens: int) -> int:
         """
         估算處理時間（秒）
@@ -240,25 +403,29 @@ class CostCalculator:
         Returns:
             批量成本資訊
         """
-        total_tokens = 0
-        total_cost = 0.0
-        total_time = 0
-        file_costs = []
+        # 並行讀取與估算各檔案以重疊磁碟I/O，結果順序與輸入一致（文檔統計快取已有鎖保護）
+        if len(file_paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+                cost_infos = list(executor.map(
+                    lambda path: self.estimate_cost(Path(path), profile_name), file_paths
+                ))
+        else:
+            cost_infos = [self.estimate_cost(Path(path), profile_name) for path in file_paths]
         
-        for file_path in file_paths:
-            cost_info = self.estimate_cost(Path(file_path), profile_name)
-            
-            if cost_info['success']:
-                total_tokens += cost_info['estimated_tokens']
-                total_cost += cost_info['estimated_cost']
-                total_time += cost_info['estimated_time']
-                
-                file_costs.append({
-                    'file': str(file_path),
-                    'tokens': cost_info['estimated_tokens'],
-                    'cost': cost_info['estimated_cost'],
-                    'time': cost_info['estimated_time']
-                })
+        # 只彙總估算成功的檔案
+        file_costs = [
+            {
+                'file': str(file_path),
+                'tokens': cost_info['estimated_tokens'],
+                'cost': cost_info['estimated_cost'],
+                'time': cost_info['estimated_time']
+            }
+            for file_path, cost_info in zip(file_paths, cost_infos)
+            if cost_info['success']
+        ]
+        total_tokens = sum(item['tokens'] for item in file_costs)
+        total_cost = sum((item['cost'] for item in file_costs), 0.0)
+        total_time = sum(item['time'] for item in file_costs)
         
         return {
             'success': True,
@@ -7,14 +7,142 @@
 
 import os
 import sys
+import time
 import shutil
 import logging
+import platform
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+_PLATFORM_SYSTEM = platform.system()
+
+if sys.platform == "win32":
+    import ctypes
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+else:
+    _kernel32 = None
+
+_ERROR_FILE_EXISTS = 80
+
+# COM 物件只能在建立它的執行緒（apartment）中使用，因此每個執行緒各自快取 WScript.Shell
+_COM_LOCAL = threading.local()
+_COPY_BUFSIZE = 1024 * 1024
+
+# 各語系的桌面目錄候選（依優先順序）
+DESKTOP_CANDIDATES = (
+    Path.home() / "Desktop",
+    Path.home() / "桌面",
+    Path.home() / "デスクトップ",  # 日文
+    Path.home() / "바탕화면",      # 韓文
+)
+
+@lru_cache(maxsize=1)
+def _existing_desktop_paths() -> Tuple[Tuple[Path, Tuple[int, int]], ...]:
+    """實際存在的桌面目錄及其檔案識別 (st_dev, st_ino)；每個候選在程序內只 stat 一次"""
+    existing = []
+    for desktop_path in DESKTOP_CANDIDATES:
+        try:
+            st = desktop_path.stat()
+        except OSError:
+            continue
+        existing.append((desktop_path, (st.st_dev, st.st_ino)))
+    return tuple(existing)
+
+@lru_cache(maxsize=1)
+def _resolved_desktop_dir() -> Optional[Path]:
+    """第一個存在的桌面目錄"""
+    existing = _existing_desktop_paths()
+    return existing[0][0] if existing else None
+
+def _is_desktop_path(directory: Path) -> bool:
+    """檢查目錄是否為桌面目錄（與 samefile 相同，以 st_dev/st_ino 比對）"""
+    identities = {identity for _, identity in _existing_desktop_paths()}
+    if not identities:
+        return False
+    st = directory.stat()
+    return (st.st_dev, st.st_ino) in identities
+
+def _fast_copy(src: Path, dst: Path) -> bool:
+    """
+    複製檔案並保留時間戳記；目的檔已存在時不覆寫
+    
+    Windows 以 CopyFileW（fail-if-exists）、Linux 以 os.sendfile 在核心內複製，
+    不經過使用者空間緩衝區，也不需事先檢查目的檔是否存在。
+    
+    Returns:
+        是否有複製（目的檔已存在時回傳 False）
+    """
+    if _kernel32 is not None:
+        if _kernel32.CopyFileW(str(src), str(dst), True):
+            return True
+        error = ctypes.get_last_error()
+        if error == _ERROR_FILE_EXISTS:
+            return False
+        raise ctypes.WinError(error)
+    
+    try:
+        fdst = open(dst, "xb")
+    except FileExistsError:
+        return False
+    try:
+        with fdst, open(src, "rb") as fsrc:
+            if sys.platform.startswith("linux"):
+                size = os.fstat(fsrc.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            else:
+                shutil.copyfileobj(fsrc, fdst, _COPY_BUFSIZE)
+        shutil.copystat(src, dst)
+    except BaseException:
+        # 不留下不完整的檔案，否則下次會因目的檔已存在而略過
+        dst.unlink(missing_ok=True)
+        raise
+    return True
+
+def _copy_missing_files(src_dir: Path, dest_dir: Path, suffixes: Optional[Tuple[str, ...]] = None) -> List[str]:
+    """
+    將來源目錄中目的目錄尚未有的檔案複製過去（不含子目錄）
+    
+    來源與目的目錄各只 scandir 一次，以檔名集合判斷是否已存在，不對每個檔案額外 stat。
+    
+    Args:
+        src_dir: 來源目錄（不存在時不做任何事）
+        dest_dir: 目的目錄
+        suffixes: 只複製這些副檔名的檔案（None 表示全部）
+        
+    Returns:
+        已複製的檔名列表
+    """
+    try:
+        with os.scandir(src_dir) as it:
+            entries = [
+                entry for entry in it
+                if entry.is_file() and (suffixes is None or entry.name.endswith(suffixes))
+            ]
+    except FileNotFoundError:
+        return []
+    
+    try:
+        with os.scandir(dest_dir) as it:
+            existing = {entry.name for entry in it}
+    except FileNotFoundError:
+        existing = set()
+    
+    copied = []
+    for entry in entries:
+        if entry.name not in existing and _fast_copy(Path(entry.path), dest_dir / entry.name):
+            copied.append(entry.name)
+    return copied
+
 class DesktopManager:
     """桌面管理器"""
     
@@ -33,32 +161,17 @@ class DesktopManager:
     def _detect_desktop_environment(self) -> bool:
         """檢測是否在桌面環境中運行"""
         try:
-            import platform
-            
             # 在 Windows 環境下，總是啟用桌面功能
-            if platform.system() == "Windows":
+            if _PLATFORM_SYSTEM == "Windows":
                 return True
             
             # 檢查是否在桌面目錄
             current_dir = Path.cwd()
-            desktop_paths = [
-                Path.home() / "Desktop",
-                Path.home() / "桌面",
-                Path.home() / "デスクトップ",  # 日文
-                Path.home() / "바탕화면",      # 韓文
-            ]
-            
-            for desktop_path in desktop_paths:
-                if desktop_path.exists() and current_dir.samefile(desktop_path):
-                    return True
+            if _is_desktop_path(current_dir):
+                return True
             
             # 檢查父目錄是否為桌面
-            parent_dir = current_dir.parent
-            for desktop_path in desktop_paths:
-                if desktop_path.exists() and parent_dir.samefile(desktop_path):
-                    return True
-            
-            return False
+            return _is_desktop_path(current_dir.parent)
             
         except Exception:
             return False
@@ -91,18 +204,7 @@ class DesktopManager:
     def _is_on_desktop(self) -> bool:
         """檢查應用程式是否在桌面"""
         try:
-            current_dir = Path.cwd()
-            desktop_paths = [
-                Path.home() / "Desktop",
-                Path.home() / "桌面",
-                Path.home() / "デスクトップ",
-                Path.home() / "바탕화면",
-            ]
-            
-            for desktop_path in desktop_paths:
-                if desktop_path.exists() and current_dir.samefile(desktop_path):
-                    return True
-            return False
+            return _is_desktop_path(Path.cwd())
         except Exception:
             return False
     
@@ -145,45 +247,15 @@ class DesktopManager:
     def _copy_default_files(self):
         """複製預設檔案到工作空間"""
         try:
-            # 獲取應用程式目錄中的預設檔案
-            app_profiles_dir = self.app_dir / "profiles"
-            app_prompts_dir = self.app_dir / "prompts"
-            app_templates_dir = self.app_dir / "templates"
-            
-            # 複製 profiles 檔案
-            if app_profiles_dir.exists():
-                profiles_dest = self.workspace_dir / "profiles"
-                for profile_file in app_profiles_dir.glob("*.yml"):
-                    dest_file = profiles_dest / profile_file.name
-                    if not dest_file.exists():  # 只複製不存在的檔案
-                        shutil.copy2(profile_file, dest_file)
-                        logger.info(f"已複製預設配置檔案: {profile_file.name}")
-            
-            # 複製 prompts 檔案
-            if app_prompts_dir.exists():
-                prompts_dest = self.workspace_dir / "prompts"
-                for prompt_file in app_prompts_dir.glob("*.md"):
-                    dest_file = prompts_dest / prompt_file.name
-                    if not dest_file.exists():  # 只複製不存在的檔案
-                        shutil.copy2(prompt_file, dest_file)
-                        logger.info(f"已複製預設提示詞檔案: {prompt_file.name}")
-                
-                # 也複製 .yaml 檔案
-                for prompt_file in app_prompts_dir.glob("*.yaml"):
-                    dest_file = prompts_dest / prompt_file.name
-                    if not dest_file.exists():  # 只複製不存在的檔案
-                        shutil.copy2(prompt_file, dest_file)
-                        logger.info(f"已複製預設提示詞檔案: {prompt_file.name}")
-            
-            # 複製 templates 檔案
-            if app_templates_dir.exists():
-                templates_dest = self.workspace_dir / "templates"
-                for template_file in app_templates_dir.glob("*"):
-                    if template_file.is_file():  # 只複製檔案，不複製目錄
-                        dest_file = templates_dest / template_file.name
-                        if not dest_file.exists():  # 只複製不存在的檔案
-                            shutil.copy2(template_file, dest_file)
-                            logger.info(f"已複製預設模板檔案: {template_file.name}")
+            # 複製 profiles、prompts（.md 與 .yaml）、templates 檔案
+            copy_plan = (
+                ("profiles", (".yml",), "配置檔案"),
+                ("prompts", (".md", ".yaml"), "提示詞檔案"),
+                ("templates", None, "模板檔案"),
+            )
+            for subdir, suffixes, label in copy_plan:
+                for name in _copy_missing_files(self.app_dir / subdir, self.workspace_dir / subdir, suffixes):
+                    logger.info(f"已複製預設{label}: {name}")
             
             logger.info("預設檔案複製完成")
             
@@ -204,46 +276,103 @@ class DesktopManager:
                         "template": ("ProDocuX 模板", self.workspace_dir / "templates")
                     }
                     
-                    created_count = 0
-                    for shortcut_type in selected_shortcuts:
-                        if shortcut_type in shortcut_options:
-                            name, target_path = shortcut_options[shortcut_type]
-                            self._create_shortcut(desktop_dir, name, target_path)
+                    shortcuts = [
+                        shortcut_options[shortcut_type]
+                        for shortcut_type in selected_shortcuts
+                        if shortcut_type in shortcut_options
+                    ]
+                    
+                    # Windows 優先以單一 IShellLink 物件批次建立，無法使用或建立失敗的項目再逐一建立
+                    remaining = shortcuts
+                    if _PLATFORM_SYSTEM == "Windows":
+                        remaining = self._create_windows_shortcuts(desktop_dir, shortcuts)
+                    created_count = len(shortcuts) - len(remaining)
+                    for name, target_path in remaining:
+                        if self._create_shortcut(desktop_dir, name, target_path):
                             created_count += 1
                     
                     logger.info(f"桌面快捷方式已創建: {created_count} 個")
         except Exception as e:
             logger.warning(f"桌面快捷方式創建失敗: {e}")
     
-    def _create_shortcut(self, desktop_dir: Path, name: str, target_path: Path):
-        """創建單個快捷方式"""
+    def _create_shortcut(self, desktop_dir: Path, name: str, target_path: Path) -> bool:
+        """創建單個快捷方式，回傳是否成功"""
         try:
-            import platform
-            
-            if platform.system() == "Windows":
+            if _PLATFORM_SYSTEM == "Windows":
                 # Windows快捷方式
                 shortcut_path = desktop_dir / f"{name}.lnk"
-                self._create_windows_shortcut(shortcut_path, target_path)
+                return self._create_windows_shortcut(shortcut_path, target_path)
             else:
                 # Unix/Linux桌面檔案
                 shortcut_path = desktop_dir / f"{name}.desktop"
-                self._create_unix_shortcut(shortcut_path, target_path)
+                return self._create_unix_shortcut(shortcut_path, target_path)
                 
         except Exception as e:
             logger.warning(f"創建快捷方式失敗 {name}: {e}")
+            return False
     
-    def _create_windows_shortcut(self, shortcut_path: Path, target_path: Path):
-        """創建Windows快捷方式"""
+    def _create_windows_shortcuts(self, desktop_dir: Path, shortcuts) -> list:
+        """
+        以單一行程內 IShellLink 物件批次建立多個Windows快捷方式
+        
+        Args:
+            desktop_dir: 桌面目錄
+            shortcuts: (名稱, 目標路徑) 列表
+            
+        Returns:
+            未建立成功的 (名稱, 目標路徑) 列表，由呼叫端改用 WScript.Shell 逐一建立
+        """
         try:
+            import pythoncom
+            from win32com.shell import shell
+        except ImportError:
+            return list(shortcuts)
+        
+        try:
+            link = pythoncom.CoCreateInstance(
+                shell.CLSID_ShellLink, None, pythoncom.CLSCTX_INPROC_SERVER, shell.IID_IShellLink
+            )
+            persist_file = link.QueryInterface(pythoncom.IID_IPersistFile)
+        except pythoncom.com_error as e:
+            logger.debug(f"無法建立 IShellLink，改用 WScript.Shell: {e}")
+            return list(shortcuts)
+        
+        failed = []
+        for name, target_path in shortcuts:
+            shortcut_path = desktop_dir / f"{name}.lnk"
+            try:
+                link.SetPath(str(target_path))
+                link.SetWorkingDirectory(str(target_path))
+                link.SetIconLocation(str(target_path), 0)
+                persist_file.Save(str(shortcut_path), 0)
+                logger.info(f"Windows快捷方式已創建: {shortcut_path}")
+            except Exception as e:
+                logger.debug(f"IShellLink 建立快捷方式失敗 {name}，改用 WScript.Shell: {e}")
+                failed.append((name, target_path))
+        return failed
+    
+    @staticmethod
+    def _get_shell():
+        """取得目前執行緒的 WScript.Shell 物件，同一執行緒建立多個捷徑時只 Dispatch 一次"""
+        shell = getattr(_COM_LOCAL, "shell", None)
+        if shell is None:
+            import pythoncom
             import win32com.client
-            
-            shell = win32com.client.Dispatch("WScript.Shell")
-            shortcut = shell.CreateShortCut(str(shortcut_path))
+            # 非主執行緒（例如 Flask 請求執行緒）需先初始化 COM
+            pythoncom.CoInitialize()
+            shell = _COM_LOCAL.shell = win32com.client.Dispatch("WScript.Shell")
+        return shell
+    
+    def _create_windows_shortcut(self, shortcut_path: Path, target_path: Path) -> bool:
+        """創建Windows快捷方式，回傳是否成功"""
+        try:
+            shortcut = self._get_shell().CreateShortCut(str(shortcut_path))
             shortcut.Targetpath = str(target_path)
             shortcut.WorkingDirectory = str(target_path)
             shortcut.IconLocation = str(target_path)
             shortcut.save()
             logger.info(f"Windows快捷方式已創建: {shortcut_path}")
+            return True
             
         except ImportError:
             logger.warning("win32com模組未安裝，使用批次檔替代")
@@ -251,11 +380,13 @@ class DesktopManager:
             batch_path = shortcut_path.with_suffix('.bat')
             with open(batch_path, 'w', encoding='utf-8') as f:
                 f.write(f'@echo off\ncd /d "{target_path}"\nstart .\n')
+            return True
         except Exception as e:
             logger.warning(f"Windows快捷方式創建失敗: {e}")
+            return False
     
-    def _create_unix_shortcut(self, shortcut_path: Path, target_path: Path):
-        """創建Unix桌面檔案"""
+    def _create_unix_shortcut(self, shortcut_path: Path, target_path: Path) -> bool:
+        """創建Unix桌面檔案，回傳是否成功"""
         try:
             desktop_entry = f"""[Desktop Entry]
 Version=1.0
@@ -272,23 +403,15 @@ Categories=Utility;
             
             # 設定執行權限
             os.chmod(shortcut_path, 0o755)
+            return True
             
         except Exception as e:
             logger.warning(f"Unix快捷方式創建失敗: {e}")
+            return False
     
     def _get_desktop_directory(self) -> Optional[Path]:
         """獲取桌面目錄"""
-        desktop_paths = [
-            Path.home() / "Desktop",
-            Path.home() / "桌面",
-            Path.home() / "デスクトップ",
-            Path.home() / "바탕화면",
-        ]
-        
-        for desktop_path in desktop_paths:
-            if desktop_path.exists():
-                return desktop_path
-        return None
+        return _resolved_desktop_dir()
     
     def _create_workspace_info(self):
         """創建工作空間說明檔案"""
@@ -403,14 +526,15 @@ ProDocuX v1.0.0
             cache_dir = self.workspace_dir / "cache"
             
             if cache_dir.exists():
-                import time
                 current_time = time.time()
                 cutoff_time = current_time - (days * 24 * 60 * 60)
                 
-                for file_path in cache_dir.iterdir():
-                    if file_path.is_file() and file_path.stat().st_mtime < cutoff_time:
-                        file_path.unlink()
-                        cleaned_count += 1
+                # scandir 的 DirEntry 會快取目錄列舉時取得的類型資訊，不需每個檔案額外 stat
+                with os.scandir(cache_dir) as it:
+                    for entry in it:
+                        if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                            os.unlink(entry.path)
+                            cleaned_count += 1
                 
                 logger.info(f"工作空間已清理 {cleaned_count} 個舊檔案")
             
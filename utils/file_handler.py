@@ -5,27 +5,74 @@
 統一管理檔案讀寫操作
 """
 
+import io
 import os
+import sys
 import json
+import time
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Union, BinaryIO
 import shutil
 
 logger = logging.getLogger(__name__)
 
+_COPY_BUFSIZE = 1024 * 1024
+
+def _copy_stream(src: BinaryIO, dst: BinaryIO):
+    """
+    將串流從目前位置複製到目的檔案
+    
+    來源是實體檔案時在 Linux 上以 os.sendfile 於核心內複製，否則以 1 MiB 緩衝區分段複製，
+    不會把整個檔案讀入記憶體。
+    """
+    # SpooledTemporaryFile 尚在記憶體中時呼叫 fileno() 會先把內容寫到暫存檔，此時直接分段複製
+    if sys.platform.startswith("linux") and getattr(src, "_rolled", True):
+        try:
+            src_fd = src.fileno()
+            offset = src.tell()
+            size = os.fstat(src_fd).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            src_fd = None
+        if src_fd is not None:
+            dst.flush()
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            src.seek(offset)
+            return
+    shutil.copyfileobj(src, dst, _COPY_BUFSIZE)
+
+@lru_cache(maxsize=1)
+def _shared_sm():
+    """
+    程序內共用的 SettingsManager
+    
+    建立 SettingsManager 會一併建立 DesktopManager 並檢查工作空間，
+    FileHandler 只需要其中的目錄路徑，因此只建立一次；
+    儲存設定後需呼叫 invalidate_shared_settings() 重新建立。
+    """
+    try:
+        from .settings_manager import SettingsManager  # 相對於 utils 模組
+    except Exception:
+        # 從 Web 應用相對路徑導入
+        from utils.settings_manager import SettingsManager  # type: ignore
+    return SettingsManager()
+
+def invalidate_shared_settings():
+    """設定或工作空間變更後呼叫，之後建立的 FileHandler 會重新讀取工作空間"""
+    _shared_sm.cache_clear()
+
 class FileHandler:
     """檔案處理工具"""
     
     def __init__(self):
         """初始化檔案處理工具"""
         # 與工作空間對齊的目錄，避免在專案目錄下創建任何資料夾
-        try:
-            from .settings_manager import SettingsManager  # 相對於 utils 模組
-        except Exception:
-            # 從 Web 應用相對路徑導入
-            from utils.settings_manager import SettingsManager  # type: ignore
-        sm = SettingsManager()
+        sm = _shared_sm()
         dirs = sm.get_directory_paths()
 
         # uploads 放在工作空間根目錄下的 uploads/
@@ -41,12 +88,12 @@ class FileHandler:
         
         logger.info("檔案處理工具已初始化 (workspace-aligned)")
     
-    def save_uploaded_file(self, file_data: bytes, filename: str) -> Path:
+    def save_uploaded_file(self, file_data: Union[bytes, BinaryIO], filename: str) -> Path:
         """
         保存上傳的檔案
         
         Args:
-            file_data: 檔案資料
+            file_data: 檔案資料，或可讀取的二進位串流（例如 Werkzeug FileStorage.stream，會分段寫入磁碟）
             filename: 檔案名稱
             
         Returns:
@@ -56,10 +103,13 @@ class FileHandler:
             file_path = self.upload_dir / filename
             logger.info(f"準備保存檔案到: {file_path}")
             logger.info(f"上傳目錄存在: {self.upload_dir.exists()}")
-            logger.info(f"檔案資料大小: {len(file_data)} bytes")
             
             with open(file_path, 'wb') as f:
-                f.write(file_data)
+                if isinstance(file_data, (bytes, bytearray, memoryview)):
+                    logger.info(f"檔案資料大小: {len(file_data)} bytes")
+                    f.write(file_data)
+                else:
+                    _copy_stream(file_data, f)
             
             # 驗證檔案是否真的保存成功
             if file_path.exists():
@@ -290,20 +340,18 @@ class FileHandler:
             清理的檔案數量
         """
         try:
-            import time
-            
-            directory = Path(directory)
             current_time = time.time()
             max_age_seconds = max_age_days * 24 * 60 * 60
             
             cleaned_count = 0
             
-            for file_path in directory.iterdir():
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > max_age_seconds:
-                        file_path.unlink()
-                        cleaned_count += 1
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        file_age = current_time - entry.stat(follow_symlinks=False).st_mtime
+                        if file_age > max_age_seconds:
+                            os.unlink(entry.path)
+                            cleaned_count += 1
             
             logger.info(f"已清理 {cleaned_count} 個舊檔案")
             return cleaned_count
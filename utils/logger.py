@@ -7,6 +7,7 @@
 
 import os
 import sys
+import time
 import logging
 import logging.handlers
 from pathlib import Path
@@ -145,7 +146,6 @@ def cleanup_old_logs(days: int = 30):
     if not log_dir.exists():
         return
     
-    import time
     current_time = time.time()
     cutoff_time = current_time - (days * 24 * 60 * 60)
     
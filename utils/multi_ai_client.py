@@ -8,6 +8,7 @@
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, Union, List
 from dotenv import load_dotenv
 from abc import ABC, abstractmethod
@@ -34,6 +35,27 @@ class BaseAIClient(ABC):
         """生成內容"""
         pass
     
+    def extract_batch(self, prompts: List[str], max_tokens: int = 4000,
+                      max_concurrency: int = 4) -> List[Union[str, Exception]]:
+        """
+        並行提取多個互不相依的提示詞
+        
+        主要成本為等待API回應的網路延遲，以執行緒池同時送出最多 max_concurrency 個請求。
+        
+        Returns:
+            依輸入順序的回應；失敗的項目為該次請求的例外物件
+        """
+        def _extract(prompt: str) -> Union[str, Exception]:
+            try:
+                return self.extract_data(prompt, max_tokens)
+            except Exception as e:
+                return e
+        
+        if len(prompts) <= 1 or max_concurrency <= 1:
+            return [_extract(prompt) for prompt in prompts]
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as pool:
+            return list(pool.map(_extract, prompts))
+    
     @abstractmethod
     def get_pricing(self) -> Dict[str, float]:
         """獲取定價資訊"""
@@ -923,6 +945,8 @@ class MultiAIClient:
         self.clients = {}
         self.current_provider = settings.get('ai_provider', 'openai')
         self.current_model = settings.get('ai_model', 'gpt-4')
+        # 分段提取時同時送出的最大請求數
+        self.max_concurrency = int(settings.get('api_settings', {}).get('max_concurrency', 4))
         
         # 初始化可用的客戶端
         self._initialize_clients()
@@ -1034,6 +1058,15 @@ class MultiAIClient:
         
         return client.extract_data(prompt, max_tokens)
     
+    def extract_batch(self, prompts: List[str], max_tokens: int = 4000,
+                      provider: str = None) -> List[Union[str, Exception]]:
+        """並行提取多個互不相依的提示詞，回傳依輸入順序的回應（失敗的項目為例外物件）"""
+        client = self.get_current_client() if not provider else self.clients.get(provider)
+        if not client:
+            raise ValueError(f"提供者 {provider or self.current_provider} 不可用")
+        
+        return client.extract_batch(prompts, max_tokens, self.max_concurrency)
+    
     def generate_content(self, prompt: str, max_tokens: int = 2000, provider: str = None) -> str:
         """生成內容"""
         client = self.get_current_client() if not provider else self.clients.get(provider)
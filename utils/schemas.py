@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI輸出格式定義
+提示詞中使用的 JSON 輸出格式，以最精簡的 JSON 字串嵌入以減少每次請求的token
+"""
+
+import json
+from typing import Any
+
+def _minify(schema: Any) -> str:
+    """將格式範例序列化為無空白的 JSON 字串"""
+    return json.dumps(schema, ensure_ascii=False, separators=(',', ':'))
+
+# 一般分析
+GENERAL_ANALYSIS_SCHEMA = _minify({
+    "文檔類型": "文檔類型",
+    "主要內容": "內容摘要",
+    "關鍵資訊": ["關鍵資訊1", "關鍵資訊2"],
+    "建議": "處理建議"
+})
+
+# 結構分析
+STRUCTURE_ANALYSIS_SCHEMA = _minify({
+    "標題": "文檔標題",
+    "章節": [{"名稱": "章節名稱", "內容": "章節摘要"}],
+    "表格": [{"標題": "表格標題", "列數": 0, "欄數": 0}]
+})
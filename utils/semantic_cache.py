@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+語意回應快取
+以句向量比對相似提示詞，重複使用內容幾乎相同的請求結果
+
+需要可選套件 sentence-transformers 與 numpy；安裝 faiss 時以 FAISS 索引搜尋，否則以 numpy 計算。
+這些套件（含 torch）載入需數秒，因此在建立 SemanticCache 時才匯入，功能停用時不影響啟動時間。
+注意：相似度門檻過低時，內容僅有少數數值不同的文件可能取得彼此的結果，預設停用。
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import tempfile
+import threading
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 於 _import_backends() 中載入
+np = None
+faiss = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# 新增項目後延遲寫入的秒數，期間的多筆變更合併為一次寫入
+SAVE_DELAY_SECONDS = 5.0
+
+def is_available() -> bool:
+    """是否已安裝語意快取所需的套件（只查詢模組是否存在，不實際匯入）"""
+    return find_spec("numpy") is not None and find_spec("sentence_transformers") is not None
+
+def _import_backends():
+    """匯入 numpy、faiss（可選）並回傳 SentenceTransformer 類別"""
+    global np, faiss
+    import numpy
+    from sentence_transformers import SentenceTransformer
+    try:
+        import faiss as faiss_module
+    except ImportError:
+        faiss_module = None
+    np = numpy
+    faiss = faiss_module
+    return SentenceTransformer
+
+def _atomic_write(path: Path, write: Callable):
+    """先寫入同目錄的暫存檔再以 os.replace 取代，寫入中途中斷不會損壞原檔案"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+class _Namespace:
+    """同一組請求參數（模型、溫度等）下的向量與回應，依加入順序保存"""
+    
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.embeddings = np.empty((0, dimension), dtype=np.float32)
+        self.responses: List[str] = []
+        self.created: List[float] = []
+        self.index = faiss.IndexFlatIP(dimension) if faiss is not None else None
+    
+    def add(self, embeddings, responses: List[str], created: List[float]):
+        self.embeddings = np.vstack([self.embeddings, embeddings])
+        self.responses.extend(responses)
+        self.created.extend(created)
+        if self.index is not None:
+            self.index.add(embeddings)
+    
+    def keep_from(self, start: int):
+        """只保留第 start 筆之後的項目（移除最舊的項目並重建索引）"""
+        if start <= 0:
+            return
+        self.embeddings = self.embeddings[start:]
+        self.responses = self.responses[start:]
+        self.created = self.created[start:]
+        if self.index is not None:
+            self.index = faiss.IndexFlatIP(self.dimension)
+            self.index.add(self.embeddings)
+    
+    def prune(self, expire_before: float, max_entries: int):
+        """移除過期項目並限制數量"""
+        start = 0
+        while start < len(self.created) and self.created[start] < expire_before:
+            start += 1
+        start = max(start, len(self.responses) - max_entries)
+        self.keep_from(start)
+    
+    def search(self, embedding):
+        """回傳最相似項目的 (相似度, 回應)，沒有資料時回傳 None"""
+        if not self.responses:
+            return None
+        if self.index is not None:
+            scores, ids = self.index.search(embedding, 1)
+            return float(scores[0][0]), self.responses[int(ids[0][0])]
+        scores = self.embeddings @ embedding[0]
+        best = int(scores.argmax())
+        return float(scores[best]), self.responses[best]
+
+class SemanticCache:
+    """語意回應快取：提示詞向量的餘弦相似度超過門檻時回傳已快取的回應"""
+    
+    def __init__(self, directory: Optional[str] = None, threshold: float = 0.95,
+                 model_name: str = DEFAULT_EMBEDDING_MODEL, max_entries: int = 5000,
+                 ttl_seconds: float = 604800):
+        """
+        初始化語意快取
+        
+        Args:
+            directory: 持久化目錄（None 表示只保留在記憶體）
+            threshold: 餘弦相似度門檻
+            model_name: 句向量模型名稱
+            max_entries: 每組請求參數最多保留的項目數（超過時移除最舊的項目）
+            ttl_seconds: 項目保留秒數
+        """
+        if not is_available():
+            raise ImportError("語意快取需要 sentence-transformers 與 numpy，請執行: pip install sentence-transformers")
+        SentenceTransformer = _import_backends()
+        
+        self.threshold = threshold
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._model = SentenceTransformer(model_name)
+        self._dimension = self._model.get_sentence_embedding_dimension()
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+        # 序列化寫檔，避免兩次寫入交錯；不與 _lock 同時持有 I/O
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        
+        self._embeddings_file = None
+        self._responses_file = None
+        if directory:
+            base = Path(directory)
+            base.mkdir(parents=True, exist_ok=True)
+            self._embeddings_file = base / "semantic_embeddings.npz"
+            self._responses_file = base / "semantic_responses.json"
+            self._load()
+            atexit.register(self.flush)
+        
+        logger.info(f"語意回應快取已初始化，模型: {model_name}，門檻: {threshold}")
+    
+    def _embed(self, text: str):
+        # 正規化後內積即為餘弦相似度
+        return self._model.encode([text], normalize_embeddings=True).astype(np.float32)
+    
+    def get(self, namespace: str, prompt: str) -> Optional[str]:
+        """查詢相似提示詞的已快取回應，未命中時回傳 None"""
+        with self._lock:
+            if namespace not in self._namespaces:
+                return None
+        embedding = self._embed(prompt)
+        with self._lock:
+            entries = self._namespaces[namespace]
+            entries.prune(time.time() - self.ttl_seconds, self.max_entries)
+            result = entries.search(embedding)
+        if result is None:
+            return None
+        similarity, response = result
+        if similarity >= self.threshold:
+            logger.info(f"命中語意回應快取（相似度 {similarity:.3f}）")
+            return response
+        return None
+    
+    def set(self, namespace: str, prompt: str, response: str):
+        """加入一筆提示詞與回應"""
+        embedding = self._embed(prompt)
+        now = time.time()
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None:
+                entries = self._namespaces[namespace] = _Namespace(self._dimension)
+            entries.add(embedding, [response], [now])
+            entries.prune(now - self.ttl_seconds, self.max_entries)
+            self._schedule_save()
+    
+    def _load(self):
+        """從持久化檔案載入；模型不同（向量不相容）時忽略舊資料"""
+        if not (self._embeddings_file.is_file() and self._responses_file.is_file()):
+            return
+        try:
+            meta = json.loads(self._responses_file.read_text(encoding="utf-8"))
+            if meta.get("model") != self.model_name:
+                logger.info("語意快取的句向量模型已變更，略過舊快取")
+                return
+            now = time.time()
+            created = meta.get("created", {})
+            with np.load(self._embeddings_file) as stored:
+                for namespace, responses in meta.get("namespaces", {}).items():
+                    if len(stored[namespace]) != len(responses):
+                        raise ValueError(f"向量與回應數量不一致: {namespace}")
+                    entries = _Namespace(self._dimension)
+                    entries.add(
+                        stored[namespace].astype(np.float32), responses,
+                        created.get(namespace, [now] * len(responses))
+                    )
+                    entries.prune(now - self.ttl_seconds, self.max_entries)
+                    self._namespaces[namespace] = entries
+        except Exception as e:
+            logger.warning(f"語意快取載入失敗，將重新建立: {e}")
+            self._namespaces = {}
+    
+    def _schedule_save(self):
+        """標記有未寫入的變更並排程延遲寫入（呼叫端需持有鎖）"""
+        if self._embeddings_file is None:
+            return
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(SAVE_DELAY_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """將未寫入的變更寫入持久化檔案；只在複製快照時持有鎖，寫檔期間不阻擋查詢"""
+        if self._embeddings_file is None:
+            return
+        with self._save_lock:
+            with self._lock:
+                self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                # 向量陣列只會被整個替換、不會原地修改，直接引用即可；清單需複製
+                snapshot = {
+                    namespace: (entries.embeddings, list(entries.responses), list(entries.created))
+                    for namespace, entries in self._namespaces.items()
+                }
+            if not self._save(snapshot):
+                with self._lock:
+                    self._dirty = True
+    
+    def _save(self, snapshot: Dict[str, tuple]) -> bool:
+        """將快照寫入持久化檔案，回傳是否成功"""
+        try:
+            _atomic_write(self._embeddings_file, lambda f: np.savez(
+                f, **{namespace: embeddings for namespace, (embeddings, _, _) in snapshot.items()}
+            ))
+            meta = {
+                "model": self.model_name,
+                "namespaces": {namespace: responses for namespace, (_, responses, _) in snapshot.items()},
+                "created": {namespace: created for namespace, (_, _, created) in snapshot.items()}
+            }
+            data = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            _atomic_write(self._responses_file, lambda f: f.write(data))
+            return True
+        except Exception as e:
+            logger.warning(f"語意快取儲存失敗: {e}")
+            return False
@@ -158,9 +158,18 @@ class SettingsManager:
                 "max_tokens": 4000,
                 "temperature": 0.1,
                 # 新增 AI 行為控制（預設保守）
-                "force_json": False,
+                # None 表示依模型自動判斷（支援 JSON 模式的模型強制輸出 JSON）
+                "force_json": None,
                 "max_tokens_cap": 4000,
-                "retry": {"enabled": False, "max_attempts": 1, "backoff_seconds": 0}
+                # 長文檔分段提取時同時送出的最大請求數
+                "max_concurrency": 4,
+                "retry": {"enabled": False, "max_attempts": 1, "backoff_seconds": 0},
+                # 固定提示詞置前，以利 API 的提示詞前綴快取
+                "cache_prefix": True,
+                # AI回應快取（相同模型與提示詞不重複請求，預設保留 7 天）
+                "response_cache": {"enabled": True, "ttl_seconds": 604800},
+                # 語意回應快取（需 sentence-transformers；相似度達門檻即重用回應，預設停用）
+                "semantic_cache": {"enabled": False, "threshold": 0.95, "max_entries": 5000, "ttl_seconds": 604800}
             },
             "processing_settings": {
                 # 分頁與截斷預設交由使用者決定
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+token計數工具
+以 tiktoken 計算token數量，不依賴AI客戶端，供成本計算與AI客戶端共用
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional
+
+# tiktoken 為可選套件，未安裝時以字數估算token
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def _get_token_encoding(model: str):
+    """取得模型對應的 tiktoken 編碼器（未安裝或無法載入時回傳 None）"""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # 非 OpenAI 或較新的模型名稱，使用通用編碼近似
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"無法載入token編碼器，改用字數估算: {e}")
+        return None
+
+def count_tokens(text: str, model: str) -> Optional[int]:
+    """
+    以 tiktoken 精確計算token數量
+    
+    Returns:
+        token數量；tiktoken 不可用時回傳 None，由呼叫端自行估算
+    """
+    encoding = _get_token_encoding(model)
+    if encoding is None:
+        return None
+    # 文檔中可能出現特殊token字樣，一律視為一般文字
+    return len(encoding.encode(text, disallowed_special=()))
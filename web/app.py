@@ -67,7 +67,7 @@ def _analyze_learning_differences(original_data: dict, corrected_data: dict) ->
 from core.profile_manager import ProfileManager
 from core.extractor import DocumentExtractor
 from core.transformer import DocumentTransformer
-from utils.file_handler import FileHandler
+from utils.file_handler import FileHandler, invalidate_shared_settings
 from utils.cost_calculator import CostCalculator
 from utils.settings_manager import SettingsManager
 from utils.pricing_manager import get_pricing_manager
@@ -244,8 +244,9 @@ def create_app():
             
             logger.info(f"File ID: {file_id}, secure filename: {filename}")
             
+            # 直接傳入上傳串流，分段寫入磁碟而不將整個檔案讀入記憶體
             file_path = file_handler.save_uploaded_file(
-                file.read(), f"{file_id}_{filename}"
+                file.stream, f"{file_id}_{filename}"
             )
             
             logger.info(f"File saved to: {file_path}")
@@ -1134,6 +1135,7 @@ def create_app():
             success = settings_manager.update_settings(data)
             
             if success:
+                invalidate_shared_settings()
                 return jsonify({'success': True, 'message': '設定已更新'})
             else:
                 return jsonify({'error': '設定更新失敗'}), 500
@@ -1295,6 +1297,7 @@ def create_app():
             success = settings_manager.reset_settings()
             
             if success:
+                invalidate_shared_settings()
                 return jsonify({'success': True, 'message': '設定已重置'})
             else:
                 return jsonify({'error': '設定重置失敗'}), 500
@@ -1455,6 +1458,7 @@ CONFIDENCE_THRESHOLD=0.7
                     logger.error(f"工作空間設置失敗: {e}")
                     return jsonify({'error': f'工作空間設置失敗: {str(e)}'}), 500
                 
+                invalidate_shared_settings()
                 return jsonify({'success': True, 'message': '設定完成'})
             else:
                 return jsonify({'error': '設定保存失敗'}), 500